@@ -0,0 +1,240 @@
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import matplotlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from datetime import datetime
+from typing import Callable, List
+from PIL import Image
+
+from benchmarks.synthetic_data import generate_gps_export, generate_rpe_sheet, SyntheticWorksheet
+from pages.gps_absolute.gps_absolute_plots import REPORT_PLOTS, draw_report_plot
+from pages.gps_relative.gps_relative_helpers import build_max_features_index, extract_max_features, \
+    build_top_k_reference, get_reference_values, build_relative_rollups, read_relative_days, read_relative_weeks
+from pages.gps_relative.gps_relative_plots import create_gps_session_report_plot, \
+    create_gps_relative_session_report_plot, create_gps_relative_week_report_plot
+from pages.helpers.constants import FEATURES_2_EXTRACT, TEAM_ANALYSIS_METRICS
+from pages.helpers.figures import close_figure, get_figure_stats
+from pages.helpers.gps_dataset import GpsDataset
+from pages.helpers.render_cache import DISPLAY_PNG_KWARGS, render_figure
+from pages.helpers.reports import build_rpe_session_df, build_rpe_team_df
+from pages.helpers.team_aggregates import build_daily_team_aggregates, slice_daily_team_aggregates
+from pages.helpers.player_identity import match_player_names, PlayerIdentityIndex
+from pages.helpers.training_load import build_session_durations, build_srpe_df, build_training_load
+from pages.rpe.rpe_helpers import get_rpe_questioneer_df, prepare_rpe_df, compute_rpe_baselines, \
+    extract_players_rpe_mean_and_std
+from pages.rpe.rpe_plots import create_rpe_session_report_plot, create_rpe_team_report_plot
+
+REPORT_DAYS = 14
+REGRESSION_THRESHOLD = 1.2
+
+
+def summarize(durations: List[float]) -> dict:
+    return {
+        'min': min(durations),
+        'median': statistics.median(durations),
+        'mean': statistics.mean(durations),
+        'runs': len(durations),
+    }
+
+
+def time_helper(fn: Callable, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return {'total': summarize(durations)}
+
+
+def time_figure(plot_fn: Callable, args: tuple, repeat: int) -> dict:
+    # build is the figure code, render the agg rasterization, encode the png compression of the rendered pixels
+    # and savefig the full path the pages take to get image bytes
+    stages = {'build': [], 'render': [], 'encode': [], 'savefig': []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = plot_fn(*args)
+        built = time.perf_counter()
+        fig.canvas.draw()
+        rendered = time.perf_counter()
+        Image.frombuffer('RGBA', fig.canvas.get_width_height(), fig.canvas.buffer_rgba()).save(io.BytesIO(), 'png')
+        encoded = time.perf_counter()
+        render_figure(fig, **DISPLAY_PNG_KWARGS)
+        saved = time.perf_counter()
+        close_figure(fig)
+
+        stages['build'].append(built - start)
+        stages['render'].append(rendered - built)
+        stages['encode'].append(encoded - rendered)
+        stages['savefig'].append(saved - encoded)
+    return {stage: summarize(durations) for stage, durations in stages.items()}
+
+
+def run_scale(seasons: int, athletes: int, seed: int, repeat: int, figures=True) -> List[dict]:
+    gps_df = generate_gps_export(seasons, athletes, seed)
+    gps_table = pa.Table.from_pandas(gps_df, preserve_index=False)
+    rpe_rows = generate_rpe_sheet(seasons, athletes, seed)
+    worksheet = SyntheticWorksheet(rpe_rows)
+
+    rpe_df = prepare_rpe_df(get_rpe_questioneer_df(worksheet))
+    baselines_df = compute_rpe_baselines(rpe_df)
+    rpe_end_date = rpe_df.session_date.max()
+    rpe_session_df = build_rpe_session_df(rpe_df, rpe_end_date)
+
+    max_index = build_max_features_index(gps_df)
+    gps_session_df = gps_df[gps_df.date_time == gps_df.date_time.max()].reset_index(drop=True)
+    gps_players = gps_session_df.athlete.unique()
+    team_aggregates_df = build_daily_team_aggregates(gps_df)
+    reference_values = get_reference_values(build_top_k_reference(gps_df))
+    rollups = build_relative_rollups(team_aggregates_df, reference_values)
+    gps_athletes = gps_df.athlete.unique()
+    identity_index = PlayerIdentityIndex(
+        athletes=tuple(sorted(gps_athletes)), names=match_player_names(rpe_df.name.unique(), gps_athletes)
+    )
+    session_durations = build_session_durations(gps_df)
+    srpe_df = build_srpe_df(rpe_df, identity_index, session_durations)
+
+    end_date = team_aggregates_df.index.max().date()
+    start_date = end_date - pd.Timedelta(days=REPORT_DAYS)
+    gps_dates = pd.to_datetime(gps_df.date_time).dt.date
+    player_df = gps_df[(gps_dates >= start_date) & (gps_df.athlete == gps_players[0])].assign(
+        date=gps_dates[gps_dates >= start_date]
+    )
+
+    helpers = {
+        'get_rpe_questioneer_df': lambda: get_rpe_questioneer_df(worksheet),
+        'prepare_rpe_df': lambda: prepare_rpe_df(get_rpe_questioneer_df(worksheet)),
+        'compute_rpe_baselines': lambda: compute_rpe_baselines(rpe_df),
+        'extract_players_rpe_mean_and_std': lambda: extract_players_rpe_mean_and_std(rpe_session_df, baselines_df),
+        'gps_dataset_view': lambda: GpsDataset(gps_table).view(
+            ['athlete', 'is_match', 'date', 'week', 'year', 'match_week', *TEAM_ANALYSIS_METRICS]
+        ),
+        'build_max_features_index': lambda: build_max_features_index(gps_df),
+        'extract_max_features': lambda: [
+            extract_max_features(max_index, gps_players, param) for param in FEATURES_2_EXTRACT
+        ],
+        'build_daily_team_aggregates': lambda: build_daily_team_aggregates(gps_df),
+        'build_top_k_reference': lambda: build_top_k_reference(gps_df),
+        'build_relative_rollups': lambda: build_relative_rollups(team_aggregates_df, reference_values),
+        'read_relative_days': lambda: read_relative_days(rollups, start_date, end_date),
+        'match_player_names': lambda: match_player_names(rpe_df.name.unique(), gps_athletes),
+        'build_srpe_df': lambda: build_srpe_df(rpe_df, identity_index, session_durations),
+        'build_training_load': lambda: build_training_load(srpe_df),
+    }
+    figure_builders = {
+        'create_rpe_session_report_plot': (create_rpe_session_report_plot, (
+            rpe_session_df.name.unique(), rpe_session_df.rpe.values, rpe_session_df.session_date.iloc[0]
+        )),
+        'create_rpe_team_report_plot': (create_rpe_team_report_plot, (
+            build_rpe_team_df(rpe_df, rpe_end_date - pd.Timedelta(days=REPORT_DAYS), rpe_end_date), 'RPE team'
+        )),
+        'create_gps_session_report_plot': (create_gps_session_report_plot, (gps_players, gps_session_df, max_index)),
+        'create_gps_relative_session_report_plot': (create_gps_relative_session_report_plot, (
+            read_relative_days(rollups, start_date, end_date),
+        )),
+        'create_gps_relative_week_report_plot': (create_gps_relative_week_report_plot, (
+            read_relative_weeks(rollups, start_date, end_date),
+        )),
+    }
+    team_df = slice_daily_team_aggregates(team_aggregates_df, start_date, end_date, TEAM_ANALYSIS_METRICS).fillna(0)
+    for plot_fn in REPORT_PLOTS:
+        figure_builders[f'{plot_fn.__name__}[player]'] = (draw_report_plot, (plot_fn, player_df, gps_players[0]))
+        figure_builders[f'{plot_fn.__name__}[team]'] = (draw_report_plot, (plot_fn, team_df, 'Team'))
+
+    scale = {'seasons': seasons, 'athletes': athletes, 'gps_rows': len(gps_df), 'rpe_rows': len(rpe_rows) - 1}
+    results = [
+        {'group': 'helper', 'name': name, **scale, 'stages': time_helper(fn, repeat)}
+        for name, fn in helpers.items()
+    ]
+    if figures:
+        results += [
+            {'group': 'figure', 'name': name, **scale, 'stages': time_figure(plot_fn, args, repeat)}
+            for name, (plot_fn, args) in figure_builders.items()
+        ]
+    return results
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_result_key(result: dict) -> tuple:
+    return result['group'], result['name'], result['seasons'], result['athletes']
+
+
+def compare_with_baseline(results: List[dict], baseline_results: List[dict], threshold=REGRESSION_THRESHOLD) -> list:
+    baseline = {get_result_key(result): result for result in baseline_results}
+    regressions = []
+    for result in results:
+        baseline_result = baseline.get(get_result_key(result))
+        if baseline_result is None:
+            continue
+        for stage, timing in result['stages'].items():
+            baseline_timing = baseline_result['stages'].get(stage)
+            if baseline_timing and timing['min'] > baseline_timing['min'] * threshold:
+                regressions.append((*get_result_key(result), stage, timing['min'] / baseline_timing['min']))
+    return regressions
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Time the analytics helpers and figure builders on synthetic data.')
+    parser.add_argument('--seasons', type=int, nargs='+', default=[1], help='season counts to generate, 1 to 10')
+    parser.add_argument('--athletes', type=int, nargs='+', default=[20], help='squad sizes to generate, 20 to 80')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic data generators')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark, the minimum is compared')
+    parser.add_argument('--skip-figures', action='store_true', help='only time the data helpers')
+    parser.add_argument('--output', help='json file the results are written to, stdout when omitted')
+    parser.add_argument('--baseline', help='json results of an earlier run, slower stages are reported')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    matplotlib.use('Agg')
+
+    results = []
+    for seasons in args.seasons:
+        for athletes in args.athletes:
+            results += run_scale(seasons, athletes, args.seed, args.repeat, figures=not args.skip_figures)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'versions': {'numpy': np.__version__, 'pandas': pd.__version__, 'matplotlib': matplotlib.__version__},
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'figures': get_figure_stats(),
+        'results': results,
+    }
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report_json)
+    else:
+        print(report_json)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_with_baseline(results, json.load(baseline_file)['results'])
+        for group, name, seasons, athletes, stage, ratio in regressions:
+            print(f'{group:<7} {name:<45} {seasons:>2} seasons {athletes:>2} athletes {stage:<8} {ratio:5.2f}x slower',
+                  file=sys.stderr)
+        return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import List
+
+from pages.helpers.constants import GPS_SCHEMA, GPS_COLUMN_RENAMES
+from pages.rpe.rpe_helpers import normalize_player_name
+
+SEASON_START = date(2015, 7, 1)
+SEASON_WEEKS = 44
+TRAINING_WEEKDAYS = (0, 1, 2, 3, 4)
+MATCH_WEEKDAY = 5
+SESSION_HOUR = 10
+RPE_SHEET_HEADER = ['Timestamp', 'Ime / Name', 'Datum treninga / Session date', 'RPE']
+
+FIRST_NAMES = ['Ivan', 'Marko', 'Luka', 'Josip', 'Ante', 'Petar', 'Matej', 'Filip', 'Karlo', 'Dario']
+LAST_NAMES = ['Horvat', 'Kovač', 'Babić', 'Marić', 'Jurić', 'Novak', 'Knežević', 'Vuković', 'Petrović', 'Šarić']
+CYRILLIC_FIRST_NAMES = ['Иван', 'Лука', 'Марко', 'Пётр', 'Филипп']
+CYRILLIC_LAST_NAMES = ['Петров', 'Иванов', 'Смирнов', 'Кузнецов', 'Соколов']
+
+# mean and standard deviation of a full training session, matches are scaled by MATCH_LOAD_FACTOR
+GPS_METRIC_PROFILES = {
+    'duration_min': (75, 12),
+    'total_distance': (6500, 1200),
+    'mpe_count': (140, 35),
+    'acc_events': (45, 12),
+    'dec_events': (42, 12),
+    'hsr_dist': (550, 180),
+    'sprint_dist': (120, 60),
+    'avg_speed_(kmh)': (5.2, 0.8),
+    'avg_hr_(bmin)': (145, 12),
+    'avg_hrr%_(%)': (68, 8),
+    'max_speed_km_h': (29, 2.5),
+    'max_acc_(ms²)': (4.5, 0.6),
+    'max_dec_(ms²)': (5.5, 0.8),
+    'max_hr_(bmin)': (188, 8),
+    'max_hrr%_(%)': (95, 3),
+    'avg_met_power_(wkg)': (9.5, 1.5),
+    'energy': (2600, 500),
+    'an_energy': (520, 140),
+    'mpe_avg_time_(s)': (2.4, 0.4),
+    'mpe_avg_power': (25, 4),
+    'mpe_avg_rec_time': (32, 8),
+    'mpe_rec_avg_power_(wkg)': (6.5, 1),
+    'speed_events': (30, 10),
+    'impacts': (60, 20),
+    'jumps': (12, 6),
+}
+MATCH_LOAD_FACTOR = 1.4
+
+
+def generate_athlete_names(athletes: int, seed=0, cyrillic_share=0.2) -> List[str]:
+    rng = np.random.default_rng(seed)
+    names = []
+    while len(names) < athletes:
+        if rng.random() < cyrillic_share:
+            name = f'{rng.choice(CYRILLIC_FIRST_NAMES)} {rng.choice(CYRILLIC_LAST_NAMES)}'
+        else:
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+        if name not in names:
+            names.append(name)
+        elif len(names) >= len(FIRST_NAMES) * len(LAST_NAMES):
+            names.append(f'{name} {len(names)}')
+    return names
+
+
+def generate_session_dates(seasons: int) -> pd.DataFrame:
+    days = []
+    for season in range(seasons):
+        season_start = SEASON_START.replace(year=SEASON_START.year + season)
+        for day_offset in range(SEASON_WEEKS * 7):
+            day = season_start + timedelta(days=day_offset)
+            if day.weekday() in TRAINING_WEEKDAYS or day.weekday() == MATCH_WEEKDAY:
+                days.append((day, day.weekday() == MATCH_WEEKDAY))
+    return pd.DataFrame(days, columns=['date', 'is_match'])
+
+
+def generate_gps_export(seasons=1, athletes=25, seed=0, attendance=0.9) -> pd.DataFrame:
+    # same columns and dtypes as read_gps_csv returns for a real export
+    rng = np.random.default_rng(seed)
+    # the GPS vendor exports latin uppercase names
+    names = np.array([normalize_player_name(name) for name in generate_athlete_names(athletes, seed)])
+    sessions_df = generate_session_dates(seasons)
+
+    session_index = np.repeat(np.arange(len(sessions_df)), athletes)
+    athlete_index = np.tile(np.arange(athletes), len(sessions_df))
+    present = rng.random(len(session_index)) < attendance
+    session_index, athlete_index = session_index[present], athlete_index[present]
+
+    is_match = sessions_df.is_match.values[session_index]
+    athlete_form = rng.normal(1, 0.1, athletes)[athlete_index]
+    load_factor = np.where(is_match, MATCH_LOAD_FACTOR, 1) * athlete_form
+
+    session_times = pd.to_datetime(sessions_df.date.values[session_index]) + pd.Timedelta(hours=SESSION_HOUR)
+    df = pd.DataFrame({
+        'date_time': pd.Series(session_times.strftime('%Y-%m-%d %H:%M:%S'), dtype='string'),
+        'athlete': pd.Series(names[athlete_index], dtype='string'),
+    })
+    for column, dtype in GPS_SCHEMA.items():
+        if dtype == 'float64':
+            mean, std = GPS_METRIC_PROFILES[column]
+            values = rng.normal(mean, std, len(df)) * load_factor
+            df[column] = np.round(np.clip(values, 0, None), 2)
+    df['is_match'] = is_match
+    return df.rename(columns=GPS_COLUMN_RENAMES)
+
+
+def generate_rpe_sheet(seasons=1, athletes=25, seed=0, response_rate=0.85) -> List[List[str]]:
+    # rows as worksheet.get_all_values returns them, header first
+    rng = np.random.default_rng(seed + 1)
+    names = np.array(generate_athlete_names(athletes, seed), dtype=object)
+    sessions_df = generate_session_dates(seasons)
+
+    session_index = np.repeat(np.arange(len(sessions_df)), athletes)
+    athlete_index = np.tile(np.arange(athletes), len(sessions_df))
+    answered = rng.random(len(session_index)) < response_rate
+    session_index, athlete_index = session_index[answered], athlete_index[answered]
+
+    session_dates = pd.to_datetime(sessions_df.date.values[session_index])
+    # answers arrive in the evening after the session, some players add a tab or lowercase their name
+    answer_delays = pd.to_timedelta(rng.integers(0, 4 * 3600, len(session_index)), 's')
+    timestamps = session_dates + pd.Timedelta(hours=17) + answer_delays
+    typed_names = pd.Series(names[athlete_index])
+    typed_names = typed_names.where(rng.random(len(typed_names)) >= 0.1, typed_names.str.lower())
+    typed_names = typed_names.where(rng.random(len(typed_names)) >= 0.05, typed_names + '\t')
+    rpe = np.clip(rng.normal(6, 2, len(session_index)), 1, 10).astype(int).astype(str)
+
+    rows = np.column_stack([
+        timestamps.strftime('%m/%d/%Y %H:%M:%S'), typed_names, session_dates.strftime('%m/%d'), rpe,
+    ])
+    return [RPE_SHEET_HEADER] + rows.tolist()
+
+
+class SyntheticWorksheet:
+    def __init__(self, rows: List[List[str]]):
+        self.rows = rows
+
+    def get_all_values(self) -> List[List[str]]:
+        return self.rows
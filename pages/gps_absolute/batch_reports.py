@@ -0,0 +1,86 @@
+import os
+import re
+import sys
+import time
+import argparse
+import matplotlib
+import pandas as pd
+from datetime import date
+from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pages.gps_absolute.gps_absolute_plots import iter_report_figures
+from pages.helpers.cache import get_cache_path
+from pages.helpers.constants import GPS_CACHE_NAME, TEAM_ANALYSIS_METRICS
+from pages.helpers.gps_data import read_gps_file
+from pages.helpers.gps_dataset import GpsDataset
+from pages.helpers.render_cache import render_figures_pdf
+
+
+def init_worker():
+    matplotlib.use('Agg')
+
+
+def get_report_path(output_dir: str, player: str, start_date: date, end_date: date) -> str:
+    player_name = re.sub(r'[^\w\-. ]', '_', player)
+    return os.path.join(output_dir, f'{player_name}_performance_{start_date}_{end_date}.pdf')
+
+
+def render_player_report(player: str, player_df: pd.DataFrame, report_path: str) -> Tuple[str, float]:
+    start = time.perf_counter()
+    pdf_bytes = render_figures_pdf(iter_report_figures(player_df, player))
+    with open(report_path, 'wb') as pdf_file:
+        pdf_file.write(pdf_bytes)
+    return player, time.perf_counter() - start
+
+
+def render_all_player_reports(dataset: GpsDataset, start_date: date, end_date: date, output_dir: str,
+                              workers=None) -> dict:
+    df = dataset.view(['athlete', 'date', *TEAM_ANALYSIS_METRICS])
+    period_df = df[(df.date >= start_date) & (df.date <= end_date)]
+    os.makedirs(output_dir, exist_ok=True)
+
+    timings = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        futures = [
+            executor.submit(
+                render_player_report, player, player_df, get_report_path(output_dir, player, start_date, end_date)
+            )
+            for player, player_df in period_df.groupby('athlete')
+        ]
+        for future in as_completed(futures):
+            player, duration = future.result()
+            timings[player] = duration
+    return timings
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Render the GPS performance pdf report of every athlete.')
+    parser.add_argument('--start', type=date.fromisoformat, required=True, help='first date, YYYY-MM-DD')
+    parser.add_argument('--end', type=date.fromisoformat, required=True, help='last date, YYYY-MM-DD')
+    parser.add_argument('--input', default=get_cache_path(GPS_CACHE_NAME),
+                        help='GPS export csv or the parquet cache written by the dashboard')
+    parser.add_argument('--output', default='reports', help='directory the pdf reports are written to')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    dataset = GpsDataset(read_gps_file(args.input))
+    load_duration = time.perf_counter() - start
+
+    timings = render_all_player_reports(dataset, args.start, args.end, args.output, workers=args.workers)
+    total_duration = time.perf_counter() - start
+
+    for player, duration in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f'{player:<30} {duration:6.2f}s')
+    print(f'Loaded data in {load_duration:.2f}s')
+    print(f'Rendered {len(timings)} reports to {args.output} in {total_duration:.2f}s '
+          f'({sum(timings.values()):.2f}s of render time on {args.workers} workers)')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
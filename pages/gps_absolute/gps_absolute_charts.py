@@ -0,0 +1,76 @@
+import altair as alt
+import pandas as pd
+from functools import partial
+from typing import Callable
+
+from pages.gps_absolute.gps_absolute_plots import AxisLabels, PlotLabels, DataFrameParameters, PlotColors, Limits, \
+    LimitsDoubleAxis, draw_hsr_sprint_plot, draw_mpe_max_sprint, draw_mpe_p_avg_rec_t, draw_distance_duration
+from pages.helpers.charts import get_x_encoding, add_overview
+
+
+def get_chart_data(df: pd.DataFrame, df_params: DataFrameParameters, x_param: str) -> pd.DataFrame:
+    # only the plotted columns are sent to the browser
+    chart_df = df[[x_param, *df_params]].copy()
+    chart_df[x_param] = chart_df[x_param].astype(str)
+    return chart_df.round(2)
+
+
+def get_color_scale(plot_label: PlotLabels, colors: PlotColors) -> alt.Scale:
+    if None in colors:
+        return alt.Scale(domain=list(plot_label))
+    return alt.Scale(domain=list(plot_label), range=list(colors))
+
+
+def chart_double_bar_plot(df: pd.DataFrame, labels: AxisLabels, plot_label: PlotLabels,
+                          df_params: DataFrameParameters, colors: PlotColors, limits: Limits, x_param='date'):
+    chart_df = get_chart_data(df, df_params, x_param)
+    brush = alt.selection_interval(encodings=['x'])
+    tooltip = [alt.Tooltip(x_param, title=labels[0])] + [
+        alt.Tooltip(param, title=label) for param, label in zip(df_params, plot_label)
+    ]
+
+    detail = alt.Chart(chart_df).transform_fold(list(df_params), as_=['param', 'value']).transform_calculate(
+        metric=f'datum.param == "{df_params[0]}" ? "{plot_label[0]}" : "{plot_label[1]}"'
+    ).mark_bar(opacity=0.7).encode(
+        x=get_x_encoding(x_param, labels[0], brush, temporal=x_param == 'date'),
+        y=alt.Y('value:Q', title=labels[1], stack=None, scale=alt.Scale(domain=list(limits))),
+        color=alt.Color('metric:N', title=None, scale=get_color_scale(plot_label, colors)),
+        tooltip=tooltip,
+    )
+    return add_overview(detail, chart_df, x_param, df_params[0], brush, temporal=x_param == 'date')
+
+
+def chart_2axis_plot(df: pd.DataFrame, labels1: AxisLabels, labels2: AxisLabels, plot_label: PlotLabels,
+                     df_params: DataFrameParameters, colors: PlotColors, limits: LimitsDoubleAxis, x_param='date'):
+    chart_df = get_chart_data(df, df_params, x_param)
+    brush = alt.selection_interval(encodings=['x'])
+    tooltip = [alt.Tooltip(x_param, title=labels1[0])] + [
+        alt.Tooltip(param, title=label) for param, label in zip(df_params, plot_label)
+    ]
+    base = alt.Chart(chart_df).encode(
+        x=get_x_encoding(x_param, labels1[0], brush, temporal=x_param == 'date'),
+        tooltip=tooltip,
+    )
+
+    bars = base.mark_bar(color=colors[0], opacity=0.8).encode(
+        y=alt.Y(df_params[0], type='quantitative', title=labels1[1], scale=alt.Scale(domain=list(limits.ax1_y_lim)),
+                axis=alt.Axis(titleColor=colors[0])),
+    )
+    line = base.mark_line(color=colors[1], point=alt.OverlayMarkDef(color=colors[1])).encode(
+        y=alt.Y(df_params[1], type='quantitative', title=labels2[1], scale=alt.Scale(domain=list(limits.ax2_y_lim)),
+                axis=alt.Axis(titleColor=colors[1])),
+    )
+    detail = alt.layer(bars, line).resolve_scale(y='independent')
+    return add_overview(detail, chart_df, x_param, df_params[0], brush, temporal=x_param == 'date')
+
+
+REPORT_CHARTS = [
+    partial(draw_hsr_sprint_plot, draw_fn=chart_double_bar_plot),
+    partial(draw_mpe_max_sprint, draw_fn=chart_2axis_plot),
+    partial(draw_mpe_p_avg_rec_t, draw_fn=chart_2axis_plot),
+    partial(draw_distance_duration, draw_fn=chart_2axis_plot),
+]
+
+
+def draw_report_chart(chart_fn: Callable, df: pd.DataFrame, title: str) -> alt.VConcatChart:
+    return chart_fn(df).properties(title=title)
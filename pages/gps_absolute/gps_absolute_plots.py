@@ -1,9 +1,11 @@
 import numpy as np
 import pandas as pd
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from typing import Tuple
+from typing import Callable, Iterator, Tuple
 from collections import namedtuple
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+
+from pages.helpers.figures import figure_style, new_figure
 
 AxisLabels = Tuple[str, str]
 PlotLabels = Tuple[str, str]
@@ -21,14 +23,18 @@ MPE_REC_T_COLOR = 'darkred'
 DISTANCE_COLOR = '#a05195'
 DURATION_COLOR = '#f95d6a'
 
+RPE_COLOR = '#665191'
+SRPE_COLOR = '#ffa600'
+
 
+@figure_style('ggplot')
 def draw_2axis_plot(df: pd.DataFrame, labels1: AxisLabels, labels2: AxisLabels, plot_label: PlotLabels,
                     df_params: DataFrameParameters, colors: PlotColors, limits: LimitsDoubleAxis, x_param='date'):
     x = np.arange(len(df[x_param]))
     width = 0.35
 
-    mpl.style.use('ggplot')
-    fig, ax1 = plt.subplots(figsize=(6, 4))
+    fig = new_figure(figsize=(6, 4))
+    ax1 = fig.subplots()
     ax2 = ax1.twinx()
 
     ax1_color = colors[0]
@@ -61,10 +67,11 @@ def draw_2axis_plot(df: pd.DataFrame, labels1: AxisLabels, labels2: AxisLabels,
     ax2.grid(False)
 
     fig.legend()
-    plt.tight_layout()
+    fig.tight_layout()
     return fig, ax1, ax2
 
 
+@figure_style('ggplot')
 def draw_double_bar_plot(df: pd.DataFrame, labels: AxisLabels, plot_label: PlotLabels, df_params: DataFrameParameters,
                          colors: PlotColors, limits: Limits, x_param='date'):
     x = np.arange(len(df[x_param]))
@@ -76,8 +83,8 @@ def draw_double_bar_plot(df: pd.DataFrame, labels: AxisLabels, plot_label: PlotL
     ax1_color = colors[0]
     ax2_color = colors[1]
 
-    mpl.style.use('ggplot')
-    fig, ax = plt.subplots(figsize=(6, 4))
+    fig = new_figure(figsize=(6, 4))
+    ax = fig.subplots()
     ax.bar(x - width / 2, df[param1], width=width, color=ax1_color, label=plot_label[0])
     ax.bar(x + width / 2, df[param2], width=width, color=ax2_color, label=plot_label[1])
 
@@ -88,13 +95,13 @@ def draw_double_bar_plot(df: pd.DataFrame, labels: AxisLabels, plot_label: PlotL
 
     ax.set_xticks(x)
     ax.set_xticklabels(df[x_param], rotation=45)
-    plt.legend()
-    plt.tight_layout()
+    ax.legend()
+    fig.tight_layout()
     return fig, ax
 
 
-MatplotlibFigureAxis = Tuple[plt.Figure, plt.Axes]
-MatplotlibFigureDoubleAxis = Tuple[plt.Figure, plt.Axes, plt.Axes]
+MatplotlibFigureAxis = Tuple[Figure, Axes]
+MatplotlibFigureDoubleAxis = Tuple[Figure, Axes, Axes]
 
 HSR_SPRINT_LIMITS = (0, 800)
 MPE_MAX_SPEED_LIMITS = LimitsDoubleAxis((0, 200), (0, 40))
@@ -103,8 +110,9 @@ TOTAL_DISTANCE_DURATION_LIMITS = LimitsDoubleAxis((0, 15000), (0, 120))
 RPE_SRPE_LIMITS = LimitsDoubleAxis((0, 10), (0, 1200))
 
 
-def draw_hsr_sprint_plot(player_df: pd.DataFrame, x_label='Dates', y_label='HSR', x_param='date') -> MatplotlibFigureAxis:
-    return draw_double_bar_plot(
+def draw_hsr_sprint_plot(player_df: pd.DataFrame, x_label='Dates', y_label='HSR', x_param='date',
+                         draw_fn=draw_double_bar_plot) -> MatplotlibFigureAxis:
+    return draw_fn(
         player_df,
         (x_label, 'Distance (m)'),
         (y_label, 'Sprint'),
@@ -115,8 +123,9 @@ def draw_hsr_sprint_plot(player_df: pd.DataFrame, x_label='Dates', y_label='HSR'
     )
 
 
-def draw_mpe_max_sprint(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date') -> MatplotlibFigureDoubleAxis:
-    return draw_2axis_plot(
+def draw_mpe_max_sprint(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date',
+                        draw_fn=draw_2axis_plot) -> MatplotlibFigureDoubleAxis:
+    return draw_fn(
         player_df,
         (x_label, 'MPE count'),
         (y_label, 'Max speed (km/h)'),
@@ -128,8 +137,9 @@ def draw_mpe_max_sprint(player_df: pd.DataFrame, x_label='Dates', y_label='Dates
     )
 
 
-def draw_mpe_p_avg_rec_t(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date') -> MatplotlibFigureDoubleAxis:
-    return draw_2axis_plot(
+def draw_mpe_p_avg_rec_t(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date',
+                         draw_fn=draw_2axis_plot) -> MatplotlibFigureDoubleAxis:
+    return draw_fn(
         player_df,
         (x_label, 'MPE avg power (W)'),
         (y_label, 'MPE avg rec time (s)'),
@@ -141,8 +151,9 @@ def draw_mpe_p_avg_rec_t(player_df: pd.DataFrame, x_label='Dates', y_label='Date
     )
 
 
-def draw_distance_duration(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date') -> MatplotlibFigureDoubleAxis:
-    return draw_2axis_plot(
+def draw_distance_duration(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date',
+                           draw_fn=draw_2axis_plot) -> MatplotlibFigureDoubleAxis:
+    return draw_fn(
         player_df,
         (x_label, 'Distance (m)'),
         (y_label, 'Duration (min)'),
@@ -152,3 +163,32 @@ def draw_distance_duration(player_df: pd.DataFrame, x_label='Dates', y_label='Da
         TOTAL_DISTANCE_DURATION_LIMITS,
         x_param=x_param
     )
+
+
+def draw_rpe_srpe(player_df: pd.DataFrame, x_label='Dates', y_label='Dates', x_param='date',
+                  draw_fn=draw_2axis_plot) -> MatplotlibFigureDoubleAxis:
+    return draw_fn(
+        player_df,
+        (x_label, 'RPE'),
+        (y_label, 'sRPE (AU)'),
+        ('RPE', 'sRPE'),
+        ('rpe', 'srpe'),
+        (RPE_COLOR, SRPE_COLOR),
+        RPE_SRPE_LIMITS,
+        x_param=x_param
+    )
+
+
+REPORT_PLOTS = [draw_hsr_sprint_plot, draw_mpe_max_sprint, draw_mpe_p_avg_rec_t, draw_distance_duration]
+
+
+@figure_style('ggplot')
+def draw_report_plot(plot_fn: Callable, df: pd.DataFrame, title: str) -> Figure:
+    fig = plot_fn(df)[0]
+    fig.suptitle(title)
+    return fig
+
+
+def iter_report_figures(df: pd.DataFrame, title: str) -> Iterator[Figure]:
+    for plot_fn in REPORT_PLOTS:
+        yield draw_report_plot(plot_fn, df, title)
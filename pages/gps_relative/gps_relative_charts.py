@@ -0,0 +1,64 @@
+import altair as alt
+import pandas as pd
+from datetime import date
+
+from pages.gps_relative.gps_relative_plots import ACCELERATION_PLOT_INDEX
+from pages.helpers.charts import get_x_encoding, add_overview
+from pages.helpers.constants import RELATIVE_PARAMS_2_EXTRACT, GPS_RELATIVE_PLOT_FILL_DESIGN
+
+UNFILLED_BAR_COLOR = 'white'
+EVENT_LINE_COLOR = 'black'
+EVENT_LINE_DASHES = [[1, 0], [4, 2], [1, 2]]
+
+
+def get_relative_chart_data(relative_df: pd.DataFrame, is_week=False) -> pd.DataFrame:
+    # weeks are placed at their monday, so both reports share the same zoomable time axis
+    if is_week:
+        x_values = [date.fromisocalendar(year, week, 1) for year, week in zip(relative_df.year, relative_df.week)]
+    else:
+        x_values = relative_df.date
+    chart_df = relative_df[RELATIVE_PARAMS_2_EXTRACT].round(2)
+    chart_df.insert(0, 'date', pd.Series(x_values, index=chart_df.index).astype(str))
+    return chart_df
+
+
+def create_gps_relative_chart(title: str, x_label: str, y_label: str, relative_df: pd.DataFrame, is_week=False):
+    chart_df = get_relative_chart_data(relative_df, is_week)
+    distance_params = RELATIVE_PARAMS_2_EXTRACT[:ACCELERATION_PLOT_INDEX]
+    event_params = RELATIVE_PARAMS_2_EXTRACT[ACCELERATION_PLOT_INDEX:]
+    distance_colors = [
+        color if fill else UNFILLED_BAR_COLOR
+        for color, fill, _, _ in GPS_RELATIVE_PLOT_FILL_DESIGN[:ACCELERATION_PLOT_INDEX]
+    ]
+    brush = alt.selection_interval(encodings=['x'])
+    base = alt.Chart(chart_df).encode(
+        x=get_x_encoding('date', x_label, brush),
+        tooltip=[alt.Tooltip('date', title=x_label)] + [
+            alt.Tooltip(param, format='.0%') for param in RELATIVE_PARAMS_2_EXTRACT
+        ],
+    )
+
+    # the distances are stacked like in the matplotlib report, the event counts are drawn as lines on top
+    distances = base.transform_fold(distance_params, as_=['param', 'value']).mark_bar(
+        stroke='black', strokeWidth=0.5
+    ).encode(
+        y=alt.Y('value:Q', title=y_label, axis=alt.Axis(format='%')),
+        color=alt.Color('param:N', title=None, scale=alt.Scale(domain=distance_params, range=distance_colors)),
+        order=alt.Order('param_order:Q'),
+    ).transform_calculate(param_order=f'indexof({distance_params}, datum.param)')
+    events = base.transform_fold(event_params, as_=['param', 'value']).mark_line(
+        color=EVENT_LINE_COLOR, point=alt.OverlayMarkDef(color=EVENT_LINE_COLOR)
+    ).encode(
+        y=alt.Y('value:Q', title=y_label),
+        strokeDash=alt.StrokeDash('param:N', title=None, scale=alt.Scale(domain=event_params, range=EVENT_LINE_DASHES)),
+    )
+    detail = alt.layer(distances, events)
+    return add_overview(detail, chart_df, 'date', distance_params[-1], brush).properties(title=title)
+
+
+def create_gps_relative_session_report_chart(relative_df: pd.DataFrame):
+    return create_gps_relative_chart('Relative session report', 'Dates', 'Game Reference', relative_df)
+
+
+def create_gps_relative_week_report_chart(relative_week_df: pd.DataFrame):
+    return create_gps_relative_chart('Relative week report', 'Weeks', 'Game Reference', relative_week_df, is_week=True)
@@ -1,20 +1,172 @@
+import heapq
+import numpy as np
 import pandas as pd
+from collections import namedtuple
 
+from pages.helpers.calendar_dimension import build_calendar
+from pages.helpers.constants import FEATURES_2_EXTRACT, RELATIVE_PARAMS_2_EXTRACT, GPS_REFERENCE_TOP_K
 
-def extract_max_for_player(all_sessions_df: pd.DataFrame, player_name: str, feature_name: str) -> float:
-    player_session_df = all_sessions_df[all_sessions_df.athlete == player_name]
-    matches_df = all_sessions_df[all_sessions_df.is_match]
+MaxFeaturesIndex = namedtuple('MaxFeaturesIndex', ['player_max', 'match_max', 'global_max'])
+# heaps and means are keyed by (metric, match_only, athlete), athlete None is the reference of the whole team
+TopKReference = namedtuple('TopKReference', ['k', 'heaps', 'means'])
+RelativeRollups = namedtuple('RelativeRollups', ['day_means', 'week_sums', 'reference', 'relative_day', 'relative_week'])
 
-    if player_session_df.empty:
-        return matches_df[feature_name].max()
-    return player_session_df[feature_name].max()
 
+def build_max_features_index(all_sessions_df: pd.DataFrame, features=FEATURES_2_EXTRACT) -> MaxFeaturesIndex:
+    features_df = all_sessions_df[features].astype(float)
+    return MaxFeaturesIndex(
+        player_max=features_df.groupby(all_sessions_df.athlete).max(),
+        match_max=features_df[all_sessions_df.is_match].max(),
+        global_max=features_df.max(),
+    )
 
-def extract_max_features(all_sessions_df: pd.DataFrame, players_list: list, param_name: str) -> list:
-    max_features = []
-    for player_name in players_list:
-        value = extract_max_for_player(all_sessions_df, player_name, param_name)
-        if value == 0:
-            value = all_sessions_df[param_name].max()
-        max_features.append(value)
-    return max_features
+
+def update_max_features_index(max_index: MaxFeaturesIndex, new_sessions_df: pd.DataFrame) -> MaxFeaturesIndex:
+    new_index = build_max_features_index(new_sessions_df, max_index.global_max.index.tolist())
+    return MaxFeaturesIndex(
+        player_max=pd.concat([max_index.player_max, new_index.player_max]).groupby(level=0).max(),
+        match_max=pd.concat([max_index.match_max, new_index.match_max], axis=1).max(axis=1),
+        global_max=pd.concat([max_index.global_max, new_index.global_max], axis=1).max(axis=1),
+    )
+
+
+def extract_max_features(max_index: MaxFeaturesIndex, players_list: list, param_name: str) -> list:
+    max_features = max_index.player_max[param_name].reindex(players_list)
+    # athletes without any session fall back to the match maximum, zero maximums to the global one
+    has_sessions = max_features.index.isin(max_index.player_max.index)
+    max_features = max_features.where(has_sessions, max_index.match_max[param_name])
+    max_features = max_features.where(max_features != 0, max_index.global_max[param_name])
+    return max_features.tolist()
+
+
+def build_top_k_reference(all_sessions_df: pd.DataFrame, metrics=RELATIVE_PARAMS_2_EXTRACT,
+                          k=GPS_REFERENCE_TOP_K) -> TopKReference:
+    heaps = {}
+    for match_only in (False, True):
+        sessions_df = all_sessions_df[all_sessions_df.is_match.astype(bool)] if match_only else all_sessions_df
+        for metric in metrics:
+            values = sessions_df[metric].astype(float).dropna()
+            heaps[(metric, match_only, None)] = values.nlargest(k).tolist()
+            top_values = values.groupby(sessions_df.athlete).nlargest(k)
+            for athlete, athlete_values in top_values.groupby(level=0):
+                heaps[(metric, match_only, athlete)] = athlete_values.tolist()
+
+    for heap in heaps.values():
+        heapq.heapify(heap)
+    return TopKReference(k=k, heaps=heaps, means={key: np.mean(heap) for key, heap in heaps.items() if heap})
+
+
+def update_top_k_reference(reference: TopKReference, new_sessions_df: pd.DataFrame) -> TopKReference:
+    metrics = list(dict.fromkeys(metric for metric, _, _ in reference.heaps))
+    new_reference = build_top_k_reference(new_sessions_df, metrics, reference.k)
+
+    # heaps are copied before they are changed, readers of the previous reference are never affected
+    heaps = dict(reference.heaps)
+    means = dict(reference.means)
+    for key, new_values in new_reference.heaps.items():
+        heap = list(heaps.get(key, []))
+        for value in new_values:
+            if len(heap) < reference.k:
+                heapq.heappush(heap, value)
+            elif value > heap[0]:
+                heapq.heapreplace(heap, value)
+        heaps[key] = heap
+        if heap:
+            means[key] = np.mean(heap)
+    return TopKReference(k=reference.k, heaps=heaps, means=means)
+
+
+def get_reference_values(reference: TopKReference, metrics=RELATIVE_PARAMS_2_EXTRACT, match_only=False,
+                         athlete=None) -> pd.Series:
+    return pd.Series({metric: reference.means.get((metric, match_only, athlete), np.nan) for metric in metrics})
+
+
+def build_day_means(team_aggregates_df: pd.DataFrame, metrics=RELATIVE_PARAMS_2_EXTRACT) -> pd.DataFrame:
+    day_means_df = team_aggregates_df[[f'{metric}_mean' for metric in metrics]]
+    day_means_df.columns = list(metrics)
+    # days without sessions count as zero load, as in the gap filled reports
+    daily_index = pd.date_range(day_means_df.index.min(), day_means_df.index.max(), freq='D')
+    day_means_df = day_means_df.reindex(daily_index, fill_value=0).fillna(0)
+    calendar_df = build_calendar(daily_index.min(), daily_index.max())
+    return day_means_df.assign(week=calendar_df.week, year=calendar_df.year)
+
+
+def compute_relative_values(values_df: pd.DataFrame, reference_values: pd.Series) -> pd.DataFrame:
+    metrics = reference_values.index.tolist()
+    return (values_df[metrics].round(2) / reference_values).round(2)
+
+
+def build_relative_rollups(team_aggregates_df: pd.DataFrame, reference_values: pd.Series) -> RelativeRollups:
+    day_means_df = build_day_means(team_aggregates_df, reference_values.index.tolist())
+    week_sums_df = day_means_df.groupby(['year', 'week'])[reference_values.index.tolist()].sum()
+    return RelativeRollups(
+        day_means=day_means_df,
+        week_sums=week_sums_df,
+        reference=reference_values,
+        relative_day=compute_relative_values(day_means_df, reference_values),
+        relative_week=compute_relative_values(week_sums_df, reference_values),
+    )
+
+
+def update_relative_rollups(rollups: RelativeRollups, team_aggregates_df: pd.DataFrame,
+                            reference_values: pd.Series) -> RelativeRollups:
+    metrics = reference_values.index.tolist()
+    if metrics != rollups.reference.index.tolist():
+        return build_relative_rollups(team_aggregates_df, reference_values)
+
+    day_means_df = build_day_means(team_aggregates_df, metrics)
+    previous_day_means_df = rollups.day_means.reindex(day_means_df.index)
+    changed_days = day_means_df.index[~(day_means_df[metrics] == previous_day_means_df[metrics]).all(axis=1)]
+    changed_metrics = [metric for metric in metrics if
+                       not np.isclose(reference_values[metric], rollups.reference[metric], equal_nan=True)]
+    if changed_days.empty and not changed_metrics and len(day_means_df) == len(rollups.day_means):
+        return rollups
+
+    # only the days and iso weeks which received new data are summed again
+    changed_weeks = pd.MultiIndex.from_frame(day_means_df.loc[changed_days, ['year', 'week']]).unique()
+    week_index = pd.MultiIndex.from_frame(day_means_df[['year', 'week']]).unique()
+    changed_week_days_df = day_means_df[pd.MultiIndex.from_frame(day_means_df[['year', 'week']]).isin(changed_weeks)]
+    week_sums_df = rollups.week_sums.reindex(week_index)
+    week_sums_df.loc[changed_weeks] = changed_week_days_df.groupby(['year', 'week'])[metrics].sum()
+
+    relative_day_df = rollups.relative_day.reindex(day_means_df.index)
+    relative_day_df.loc[changed_days] = compute_relative_values(day_means_df.loc[changed_days], reference_values)
+    relative_week_df = rollups.relative_week.reindex(week_index)
+    relative_week_df.loc[changed_weeks] = compute_relative_values(week_sums_df.loc[changed_weeks], reference_values)
+
+    # a new game reference rescales every rollup of its metric, the other metrics are kept as they are
+    if changed_metrics:
+        changed_reference = reference_values[changed_metrics]
+        relative_day_df[changed_metrics] = compute_relative_values(day_means_df, changed_reference)
+        relative_week_df[changed_metrics] = compute_relative_values(week_sums_df, changed_reference)
+
+    return RelativeRollups(
+        day_means=day_means_df,
+        week_sums=week_sums_df,
+        reference=reference_values,
+        relative_day=relative_day_df,
+        relative_week=relative_week_df,
+    )
+
+
+def read_relative_days(rollups: RelativeRollups, start_date, end_date) -> pd.DataFrame:
+    relative_day_df = rollups.relative_day.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+    relative_day_df = relative_day_df.assign(week=rollups.day_means.week)
+    relative_day_df.insert(0, 'date', relative_day_df.index.date)
+    return relative_day_df.reset_index(drop=True)
+
+
+def read_relative_weeks(rollups: RelativeRollups, start_date, end_date) -> pd.DataFrame:
+    days_df = rollups.day_means.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+    day_weeks = pd.MultiIndex.from_frame(days_df[['year', 'week']])
+    weeks = day_weeks.unique()
+    relative_week_df = rollups.relative_week.loc[weeks]
+    if weeks.empty:
+        return relative_week_df.reset_index()
+
+    # the first and last week only count their days inside the range, the weeks between them are read as they are
+    edge_weeks = weeks[[0, -1]].unique()
+    metrics = rollups.reference.index.tolist()
+    edge_sums_df = days_df[day_weeks.isin(edge_weeks)].groupby(['year', 'week'])[metrics].sum()
+    relative_week_df.loc[edge_weeks] = compute_relative_values(edge_sums_df, rollups.reference).loc[edge_weeks]
+    return relative_week_df.reset_index()
@@ -1,25 +1,30 @@
 import numpy as np
 import pandas as pd
-import matplotlib as mpl
-import matplotlib.pyplot as plt
 import matplotlib.ticker as mtick
+import matplotlib.dates as mdates
 from typing import Tuple
 from datetime import timedelta
-
-from pages.gps_relative.gps_relative_helpers import extract_max_features
-from pages.helpers.constants import FEATURES_2_EXTRACT, RELATIVE_PARAMS_2_EXTRACT, GPS_RELATIVE_PLOT_FILL_DESIGN
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+from matplotlib.ticker import MaxNLocator
+
+from pages.gps_relative.gps_relative_helpers import MaxFeaturesIndex, extract_max_features
+from pages.helpers.constants import FEATURES_2_EXTRACT, RELATIVE_PARAMS_2_EXTRACT, GPS_RELATIVE_PLOT_FILL_DESIGN, \
+    GPS_COLUMN_LABELS
+from pages.helpers.figures import figure_style, new_figure
 from pages.rpe.rpe_plots import get_colors_and_percentages
 
 
+@figure_style('dark_background')
 def create_gps_single_session_plot(
         players: np.array,
         session_df: pd.DataFrame,
-        whole_df: pd.DataFrame,
-) -> plt.Figure:
+        max_index: MaxFeaturesIndex,
+) -> Figure:
     num_columns = 4
     num_players = players.shape[0]
-    plt.style.use('dark_background')
-    fig, axs = plt.subplots(figsize=(30, 20 + num_players), nrows=2, ncols=num_columns)
+    fig = new_figure(figsize=(30, 20 + num_players))
+    axs = fig.subplots(nrows=2, ncols=num_columns)
     facecolor = "#00001a"
     fig.set_facecolor(facecolor)
 
@@ -28,7 +33,7 @@ def create_gps_single_session_plot(
 
     ax_count = 0
     for param, ax in zip(FEATURES_2_EXTRACT, axs.reshape(-1)):
-        max_features = extract_max_features(whole_df, players, param)
+        max_features = extract_max_features(max_index, players, param)
         ax.set_xticks([], [])
         session_param_values = session_df[param].values
         is_inverse = True if param == 'mpe_avg_rec_time' else False
@@ -52,7 +57,7 @@ def create_gps_single_session_plot(
         ax_count += 1
         ax.set_facecolor(facecolor)
         ax.set_frame_on(False)
-        ax.set_title(param, fontsize=25)
+        ax.set_title(GPS_COLUMN_LABELS.get(param, param), fontsize=25)
     return fig
 
 
@@ -73,7 +78,7 @@ def pick_x_values_single_relative_plot(relative_df: pd.DataFrame, plot_index: in
 
 
 def pick_x_values_week_relative_plot(relative_df: pd.DataFrame, plot_index: int) -> np.array:
-    x_values = relative_df.week.values.copy()
+    x_values = relative_df.week.values.astype(float)
     x_offset = 0.2
 
     if plot_index == ACCELERATION_PLOT_INDEX:
@@ -83,15 +88,16 @@ def pick_x_values_week_relative_plot(relative_df: pd.DataFrame, plot_index: int)
     return x_values
 
 
+@figure_style('classic')
 def create_gps_relative_plot(
         title: str,
         x_label: str,
         y_label: str,
         relative_df: pd.DataFrame,
         is_week=False
-) -> Tuple[plt.Figure, plt.Axes]:
-    mpl.style.use('classic')
-    fig, ax = plt.subplots(figsize=(12, 8))
+) -> Tuple[Figure, Axes]:
+    fig = new_figure(figsize=(12, 8))
+    ax = fig.subplots()
     fig.suptitle(title, fontsize=30, weight='bold')
     facecolor = "white"
     fig.set_facecolor(facecolor)
@@ -140,3 +146,45 @@ def create_gps_relative_plot(
         fontsize=14
     )
     return fig, ax
+
+
+@figure_style('dark_background')
+def create_gps_session_report_plot(players: np.array, session_df: pd.DataFrame,
+                                   max_index: MaxFeaturesIndex) -> Figure:
+    fig = create_gps_single_session_plot(
+        players=players,
+        session_df=session_df,
+        max_index=max_index
+    )
+    fig.text(0.92, 0.1, "Created by Arian Skoki", ha="center", fontsize=18, weight='bold')
+    return fig
+
+
+@figure_style('classic')
+def create_gps_relative_session_report_plot(relative_df: pd.DataFrame) -> Figure:
+    fig, ax = create_gps_relative_plot(
+        title='Relative session report',
+        x_label='Dates',
+        y_label='Game Reference',
+        relative_df=relative_df
+    )
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%Y'))
+    ax.xaxis.set_major_locator(mdates.DayLocator())
+    ax.tick_params(axis='x', labelrotation=15)
+    fig.text(0.82, 0.01, "Created by Arian Skoki", ha="center", fontsize=14, weight='bold')
+    return fig
+
+
+@figure_style('classic')
+def create_gps_relative_week_report_plot(relative_week_df: pd.DataFrame) -> Figure:
+    fig, ax = create_gps_relative_plot(
+        title='Relative week report',
+        x_label='Weeks',
+        y_label='Game Reference',
+        relative_df=relative_week_df,
+        is_week=True
+    )
+    ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+    ax.tick_params(axis='x', labelrotation=15)
+    fig.text(0.82, 0.01, "Created by Arian Skoki", ha="center", fontsize=14, weight='bold')
+    return fig
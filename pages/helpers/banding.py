@@ -0,0 +1,42 @@
+import numpy as np
+from typing import Tuple
+
+from pages.helpers.constants import RPE_COLOR_DICT, DEVIATION_NORMAL_COLOR, DEVIATION_WARNING_COLOR, \
+    DEVIATION_DANGER_COLOR, PERCENTAGE_LOW_COLOR, PERCENTAGE_NEUTRAL_COLOR, PERCENTAGE_HIGH_COLOR, PERCENTAGE_LOW, \
+    PERCENTAGE_HIGH
+
+# index 0 is used for values below the scale, those bars have no height anyway
+RPE_ZONE_COLORS = np.array(['none'] + [RPE_COLOR_DICT[rpe_value] for rpe_value in range(1, 11)])
+DEVIATION_COLORS = np.array([DEVIATION_NORMAL_COLOR, DEVIATION_WARNING_COLOR, DEVIATION_DANGER_COLOR])
+PERCENTAGE_COLORS = np.array([PERCENTAGE_LOW_COLOR, PERCENTAGE_NEUTRAL_COLOR, PERCENTAGE_HIGH_COLOR])
+
+BandedValues = Tuple[np.ndarray, np.ndarray]
+
+
+def band_rpe_zones(values) -> BandedValues:
+    values = np.nan_to_num(np.asarray(values, dtype=float), nan=0)
+    bands = np.rint(values).clip(0, 10).astype(int)
+    return RPE_ZONE_COLORS[bands], bands
+
+
+def band_deviation(values, means, stds) -> BandedValues:
+    values, means, stds = np.broadcast_arrays(
+        np.asarray(values, dtype=float), np.asarray(means, dtype=float), np.asarray(stds, dtype=float)
+    )
+    # comparisons against a missing baseline are False, so those values stay in the normal band
+    deviation = np.abs(values - means)
+    levels = np.where(deviation > 2 * stds, 2, np.where(deviation > stds, 1, 0))
+    bands = np.where(values < means, -levels, levels)
+    return DEVIATION_COLORS[levels], bands
+
+
+def band_percentage_of_max(values, maxima, low=PERCENTAGE_LOW, high=PERCENTAGE_HIGH,
+                           inverse_colors=False) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    values, maxima = np.broadcast_arrays(np.asarray(values, dtype=float), np.asarray(maxima, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentages = values / maxima * 100
+    percentages = np.trunc(np.nan_to_num(percentages, nan=0, posinf=0, neginf=0)).astype(int)
+
+    bands = np.select([percentages < low, percentages < high], [0, 1], default=2)
+    colors = PERCENTAGE_COLORS[::-1][bands] if inverse_colors else PERCENTAGE_COLORS[bands]
+    return colors, bands, percentages
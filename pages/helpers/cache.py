@@ -0,0 +1,96 @@
+import json
+import os
+import time
+import threading
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pandas as pd
+from typing import Callable, Optional, Tuple
+
+from pages.helpers.constants import CACHE_DIR
+
+CACHE_META_KEY = b'orijent_cache'
+
+
+def get_cache_path(name: str) -> str:
+    return os.path.join(CACHE_DIR, f'{name}.parquet')
+
+
+def read_cache_meta(name: str) -> dict:
+    path = get_cache_path(name)
+    if not os.path.exists(path):
+        return {}
+    metadata = pq.read_schema(path).metadata or {}
+    if CACHE_META_KEY not in metadata:
+        return {}
+    return json.loads(metadata[CACHE_META_KEY])
+
+
+def read_cached_table(name: str) -> Tuple[Optional[pa.Table], dict]:
+    meta = read_cache_meta(name)
+    if not meta:
+        return None, {}
+    return pq.read_table(get_cache_path(name)), meta
+
+
+def read_cached_frame(name: str) -> Tuple[Optional[pd.DataFrame], dict]:
+    table, meta = read_cached_table(name)
+    if table is None:
+        return None, {}
+    return table.to_pandas(), meta
+
+
+def write_cached_table(name: str, table: pa.Table, meta: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta = {**meta, 'written_at': time.time()}
+
+    # meta lives in the parquet footer so table and meta are always replaced together
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        CACHE_META_KEY: json.dumps(meta, default=str),
+    })
+    path = get_cache_path(name)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def write_cached_frame(name: str, df: pd.DataFrame, meta: dict):
+    write_cached_table(name, pa.Table.from_pandas(df, preserve_index=False), meta)
+
+
+_derived_stores = {}
+_derived_stores_lock = threading.Lock()
+
+
+def refresh_derived_store(name: str, df: pd.DataFrame, date_col: str, build_fn: Callable, update_fn: Callable):
+    with _derived_stores_lock:
+        entry = _derived_stores.get(name)
+        # the source is kept alive by the entry, so a new frame can never reuse the id of the one it was built from
+        if entry is not None and entry['source'] is df:
+            return entry['store']
+
+        dates = pd.to_datetime(df[date_col])
+        last_date = dates.max()
+        if entry is None or (dates <= entry['last_date']).sum() != entry['rows']:
+            # first load, or already covered dates were changed, the store has to be rebuilt
+            store = build_fn(df)
+        else:
+            new_df = df[dates > entry['last_date']]
+            store = update_fn(entry['store'], new_df) if not new_df.empty else entry['store']
+
+        _derived_stores[name] = {'store': store, 'source': df, 'rows': len(df), 'last_date': last_date}
+        return store
+
+
+def refresh_dependent_store(name: str, dependencies: tuple, build_fn: Callable, update_fn: Callable):
+    # a store built from other stores is only touched again once one of them was replaced
+    with _derived_stores_lock:
+        entry = _derived_stores.get(name)
+        dependency_ids = tuple(id(dependency) for dependency in dependencies)
+        if entry is not None and entry['dependency_ids'] == dependency_ids:
+            return entry['store']
+
+        store = build_fn(*dependencies) if entry is None else update_fn(entry['store'], *dependencies)
+        _derived_stores[name] = {'store': store, 'dependency_ids': dependency_ids, 'dependencies': dependencies}
+        return store
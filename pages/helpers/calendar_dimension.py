@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+
+def build_calendar(start_date, end_date, match_dates=()) -> pd.DataFrame:
+    # every caller of the same range shares one calendar, it must not be modified
+    match_dates = tuple(sorted(pd.to_datetime(pd.Series(match_dates, dtype=object)).dt.normalize().unique()))
+    return build_calendar_for_range(pd.Timestamp(start_date), pd.Timestamp(end_date), match_dates)
+
+
+@lru_cache(maxsize=32)
+def build_calendar_for_range(start_date: pd.Timestamp, end_date: pd.Timestamp, match_dates: tuple) -> pd.DataFrame:
+    dates = pd.date_range(start_date, end_date, freq='D')
+    iso_calendar = dates.isocalendar()
+    is_match_day = dates.isin(pd.DatetimeIndex(match_dates))
+
+    # a match week runs from the day after a match up to and including the next match
+    matches_before = np.cumsum(is_match_day) - is_match_day
+    return pd.DataFrame({
+        'week': iso_calendar.week.values.astype(int),
+        'year': iso_calendar.year.values.astype(int),
+        'day_index': np.arange(len(dates)),
+        'is_match_day': is_match_day,
+        'match_week': matches_before + 1,
+    }, index=dates)
+
+
+def build_calendar_for_dates(dates: pd.Series, match_dates=()) -> pd.DataFrame:
+    return build_calendar(dates.min(), dates.max(), match_dates)
+
+
+def add_calendar_columns(df: pd.DataFrame, date_col: str, calendar_df: pd.DataFrame,
+                         columns=('week', 'year')) -> pd.DataFrame:
+    calendar_columns_df = read_calendar_columns(calendar_df, df[date_col], columns)
+    return df.assign(**{column: calendar_columns_df[column].values for column in columns})
+
+
+def read_calendar_columns(calendar_df: pd.DataFrame, dates, columns) -> pd.DataFrame:
+    # dates outside of the calendar get missing values
+    return calendar_df[list(columns)].reindex(pd.DatetimeIndex(pd.to_datetime(dates)))
+
+
+def fill_daily_gaps(df: pd.DataFrame, date_col: str, start_date, end_date, fill_value=0) -> pd.DataFrame:
+    daily_index = pd.date_range(start_date, end_date, freq='D')
+    filled_df = df.set_index(pd.DatetimeIndex(pd.to_datetime(df[date_col]))).drop(columns=[date_col])
+    filled_df = filled_df.reindex(daily_index, fill_value=fill_value)
+    filled_df.insert(0, date_col, daily_index.date)
+    return filled_df.reset_index(drop=True)
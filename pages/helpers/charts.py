@@ -0,0 +1,20 @@
+import altair as alt
+import pandas as pd
+
+CHART_HEIGHT = 260
+OVERVIEW_HEIGHT = 50
+
+
+def get_x_encoding(x_param: str, label: str, brush=None, temporal=True) -> alt.X:
+    scale = alt.Scale(domain=brush) if brush is not None else alt.Undefined
+    return alt.X(x_param, type='temporal' if temporal else 'ordinal', title=label, scale=scale)
+
+
+def add_overview(detail: alt.Chart, chart_df: pd.DataFrame, x_param: str, y_param: str, brush,
+                 temporal=True) -> alt.VConcatChart:
+    # brushing a range on the small overview zooms the detail chart, all of it happens in the browser
+    overview = alt.Chart(chart_df).mark_area(opacity=0.5).encode(
+        x=get_x_encoding(x_param, '', temporal=temporal),
+        y=alt.Y(y_param, type='quantitative', title=None, axis=alt.Axis(labels=False, ticks=False)),
+    ).add_selection(brush).properties(height=OVERVIEW_HEIGHT, width='container')
+    return alt.vconcat(detail.properties(height=CHART_HEIGHT, width='container'), overview)
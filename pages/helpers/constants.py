@@ -20,6 +20,16 @@ RPE_COLOR_DICT = {
     10: RPE10_COLOR,
 }
 
+DEVIATION_NORMAL_COLOR = 'skyblue'
+DEVIATION_WARNING_COLOR = '#ffcc00'
+DEVIATION_DANGER_COLOR = 'tomato'
+
+PERCENTAGE_LOW_COLOR = 'tomato'
+PERCENTAGE_NEUTRAL_COLOR = 'steelblue'
+PERCENTAGE_HIGH_COLOR = 'forestgreen'
+PERCENTAGE_LOW = 40
+PERCENTAGE_HIGH = 80
+
 RPE_LEGEND_LIST = [
     mpatches.Patch(color=RPE1_COLOR, label='Very Light'),
     mpatches.Patch(color=RPE23_COLOR, label='Light'),
@@ -29,14 +39,69 @@ RPE_LEGEND_LIST = [
     mpatches.Patch(color=RPE10_COLOR, label='Max Effort'),
 ]
 
+# export column -> dtype, only these columns are parsed from the GPS csv
+GPS_SCHEMA = {
+    'date_time': 'string',
+    'athlete': 'string',
+    'duration_min': 'float64',
+    'total_distance': 'float64',
+    'mpe_count': 'float64',
+    'acc_events': 'float64',
+    'dec_events': 'float64',
+    'hsr_dist': 'float64',
+    'sprint_dist': 'float64',
+    'avg_speed_(kmh)': 'float64',
+    'avg_hr_(bmin)': 'float64',
+    'avg_hrr%_(%)': 'float64',
+    'max_speed_km_h': 'float64',
+    'max_acc_(ms²)': 'float64',
+    'max_dec_(ms²)': 'float64',
+    'max_hr_(bmin)': 'float64',
+    'max_hrr%_(%)': 'float64',
+    'avg_met_power_(wkg)': 'float64',
+    'energy': 'float64',
+    'an_energy': 'float64',
+    'mpe_avg_time_(s)': 'float64',
+    'mpe_avg_power': 'float64',
+    'mpe_avg_rec_time': 'float64',
+    'mpe_rec_avg_power_(wkg)': 'float64',
+    'speed_events': 'float64',
+    'impacts': 'float64',
+    'jumps': 'float64',
+    'is_match': 'bool',
+}
+GPS_COLUMN_RENAMES = {
+    'total_distance': 'tot_dist',
+    'mpe_count': 'mpe',
+    'acc_events': 'acc_num',
+    'dec_events': 'dec_num',
+}
+# plots keep titling the renamed columns with their export names
+GPS_COLUMN_LABELS = {column: label for label, column in GPS_COLUMN_RENAMES.items()}
+GPS_CSV_BLOCK_SIZE = 1 << 20
+GPS_METRICS = [GPS_COLUMN_RENAMES.get(column, column) for column, dtype in GPS_SCHEMA.items() if dtype == 'float64']
+TEAM_ANALYSIS_METRICS = [
+    'duration_min', 'tot_dist', 'max_speed_km_h', 'mpe', 'acc_num', 'dec_num', 'energy', 'an_energy',
+    'mpe_avg_power', 'mpe_avg_rec_time', 'hsr_dist', 'sprint_dist'
+]
+
 FEATURES_2_EXTRACT = [
-    'total_distance', 'hsr_dist', 'sprint_dist', 'max_speed_km_h',
-    'mpe_count', 'acc_events', 'dec_events', 'mpe_avg_rec_time'
+    'tot_dist', 'hsr_dist', 'sprint_dist', 'max_speed_km_h',
+    'mpe', 'acc_num', 'dec_num', 'mpe_avg_rec_time'
 ]
 
 RELATIVE_PARAMS_2_EXTRACT = [
     'sprint_dist', 'hsr_dist', 'tot_dist', 'acc_num', 'dec_num', 'mpe'
 ]
+GPS_REFERENCE_TOP_K = 5
+ACUTE_LOAD_DAYS = 7
+CHRONIC_LOAD_DAYS = 28
+
+# rpe name -> GPS athlete, for players whose typed name does not resemble the name in the GPS export
+PLAYER_NAME_ALIASES = {}
+PLAYER_NAME_MATCH_CUTOFF = 0.85
+RPE_GPS_JOIN_TOLERANCE_DAYS = 1
+INTERACTIVE_CHART_MIN_DAYS = 60
 
 DARK_GRAY = '#7f7f7f'
 LIGHT_GRAY = '#d9d9d9'
@@ -48,3 +113,26 @@ GPS_RELATIVE_PLOT_FILL_DESIGN = [
     (None, False, 'OO', 0.2),
     (None, False, '', 0.2)
 ]
+
+CACHE_DIR = '.cache'
+SECRETS_PATH = '.streamlit/secrets.toml'
+RPE_CACHE_NAME = 'rpe_responses'
+GPS_CACHE_NAME = 'gps_export'
+PLAYER_IDENTITY_CACHE_NAME = 'player_identity'
+PLAYER_IDENTITY_CACHE_VERSION = 1
+RPE_CACHE_TTL_SECONDS = 60 * 10
+RPE_CACHE_VERSION = 2
+
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+RENDER_CACHE_MAX_ENTRIES = 512
+TIMING_LOG_MAX_ENTRIES = 5000
+GPS_DATA_TTL_SECONDS = 60 * 60
+DATA_FETCH_TIMEOUT_SECONDS = 10
+DATA_FETCH_WORKERS = 4
+REPORT_SERVICE_QUEUE_SIZE = 16
+REPORT_SERVICE_TIMEOUT_SECONDS = 120
+
+RPE_TIMESTAMP_FORMAT = '%m/%d/%Y %H:%M:%S'
+RPE_SESSION_DATE_FORMAT = '%m/%d/%Y'
+RPE_SHEET_TIMEZONE = 'UTC'
+RPE_LOCAL_TIMEZONE = 'Europe/Zagreb'
@@ -0,0 +1,138 @@
+import time
+import toml
+import gspread
+import logging
+import threading
+import pandas as pd
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from functools import partial
+from typing import Optional, Tuple
+
+from pages.helpers.cache import read_cached_frame, read_cached_table
+from pages.helpers.constants import SECRETS_PATH, GPS_CACHE_NAME, RPE_CACHE_NAME, RPE_CACHE_VERSION, \
+    DATA_FETCH_WORKERS
+from pages.helpers.google_api import GoogleClientProvider, execute_with_backoff
+from pages.helpers.gps_data import load_gps_export
+from pages.helpers.gps_dataset import GpsDataset
+from pages.rpe.rpe_helpers import load_rpe_questioneer_df, prepare_rpe_df, compute_rpe_baselines
+
+# load_fn receives force_refresh, fallback_fn returns the copy on disk or None
+DataSource = namedtuple('DataSource', ['load_fn', 'ttl_seconds', 'fallback_fn'])
+# error holds the exception of a failed fetch whose last copy is served instead
+FetchedData = namedtuple('FetchedData', ['value', 'loaded_at', 'is_stale', 'error'], defaults=(None,))
+logger = logging.getLogger(__name__)
+
+
+def load_secrets(path=SECRETS_PATH) -> dict:
+    # the same file streamlit reads into st.secrets
+    return toml.load(path)
+
+
+def load_gps_data(provider: GoogleClientProvider, google_drive_config: dict) -> GpsDataset:
+    return GpsDataset(load_gps_export(
+        provider.get_drive_service(), google_drive_config['gps_file_name'], google_drive_config['gps_folder_id']
+    ))
+
+
+def open_rpe_worksheet(provider: GoogleClientProvider, sheet_name: str) -> gspread.Worksheet:
+    client = provider.get_gspread_client()
+    spreadsheet = execute_with_backoff(lambda: client.open(sheet_name))
+    return spreadsheet.sheet1
+
+
+def load_rpe_frames(provider: GoogleClientProvider, sheet_name: str, ttl_seconds: int,
+                    force_refresh=False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    rpe_df = load_rpe_questioneer_df(
+        lambda: open_rpe_worksheet(provider, sheet_name), ttl_seconds, force_refresh=force_refresh
+    )
+    rpe_df = prepare_rpe_df(rpe_df)
+    return rpe_df, compute_rpe_baselines(rpe_df)
+
+
+def load_cached_gps_data() -> Optional[GpsDataset]:
+    table, _ = read_cached_table(GPS_CACHE_NAME)
+    return None if table is None else GpsDataset(table)
+
+
+def load_cached_rpe_frames() -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    rpe_df, meta = read_cached_frame(RPE_CACHE_NAME)
+    if rpe_df is None or meta.get('version') != RPE_CACHE_VERSION:
+        return None
+    rpe_df = prepare_rpe_df(rpe_df)
+    return rpe_df, compute_rpe_baselines(rpe_df)
+
+
+_fetch_executor = ThreadPoolExecutor(max_workers=DATA_FETCH_WORKERS, thread_name_prefix='data_fetch')
+_fetched = {}
+_pending_fetches = {}
+_fetch_lock = threading.RLock()
+
+
+def store_fetched(name: str, future):
+    with _fetch_lock:
+        if _pending_fetches.get(name) is future:
+            del _pending_fetches[name]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            # logged once when the fetch fails, not on every rerun which serves the last copy
+            logger.error('Fetching the %s data failed', name, exc_info=future.exception())
+            return
+        _fetched[name] = FetchedData(future.result(), time.time(), False)
+
+
+def get_usable_copy(name: str, source: DataSource, error: Exception = None) -> FetchedData:
+    with _fetch_lock:
+        fetched = _fetched.get(name)
+    if fetched is not None:
+        return fetched._replace(is_stale=True, error=error)
+
+    value = source.fallback_fn()
+    if value is None:
+        # nothing was ever loaded, so there is nothing to show instead
+        raise error or FutureTimeoutError(f'The {name} data is still loading')
+    with _fetch_lock:
+        # the disk copy is kept until the fetch lands, so stores derived from it stay valid between reruns
+        fetched = _fetched.setdefault(name, FetchedData(value, time.time(), True))
+    return fetched._replace(is_stale=True, error=error)
+
+
+def fetch_data_sources(sources: dict, timeout_seconds: float, refresh=()) -> dict:
+    now = time.time()
+    with _fetch_lock:
+        futures = {}
+        started = set()
+        for name, source in sources.items():
+            fetched = _fetched.get(name)
+            is_fresh = fetched is not None and not fetched.is_stale and now - fetched.loaded_at < source.ttl_seconds
+            if is_fresh and name not in refresh:
+                continue
+            future = _pending_fetches.get(name)
+            if future is None:
+                future = _fetch_executor.submit(source.load_fn, name in refresh)
+                _pending_fetches[name] = future
+                future.add_done_callback(partial(store_fetched, name))
+                started.add(name)
+            futures[name] = future
+        # a fetch an earlier call already waited for is not waited for again while there is a copy to show
+        waited = {name for name in futures if name in started or name not in _fetched}
+
+    # every fetch is started before any is waited for, all of them share one deadline
+    deadline = time.monotonic() + timeout_seconds
+    results = {}
+    for name, source in sources.items():
+        if name not in futures:
+            results[name] = _fetched[name]
+            continue
+        future = futures[name]
+        if name in waited:
+            wait([future], timeout=max(0, deadline - time.monotonic()))
+        if not future.done():
+            # a slow fetch keeps running and is picked up by a later rerun
+            results[name] = get_usable_copy(name, source)
+        elif future.exception() is not None:
+            results[name] = get_usable_copy(name, source, future.exception())
+        else:
+            results[name] = FetchedData(future.result(), time.time(), False)
+    return results
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+import weakref
+import matplotlib
+import matplotlib.style as mpl_style
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# styles swap the process wide rcParams, so figures of one style are built and saved together while other styles wait
+_style_condition = threading.Condition()
+_style_state = {'style': None, 'holders': 0, 'restore': None, 'waiting': Counter()}
+_style_params = {}
+_thread_styles = threading.local()
+_figure_styles = weakref.WeakKeyDictionary()
+_live_figures = weakref.WeakSet()
+
+
+def get_style_params(style: str) -> dict:
+    # only called while no style is applied, so the style is resolved against the defaults of the process
+    if style not in _style_params:
+        with matplotlib.rc_context():
+            mpl_style.use(style)
+            _style_params[style] = matplotlib.rcParams.copy()
+    return _style_params[style]
+
+
+def can_apply_style(style: str) -> bool:
+    if _style_state['holders'] == 0:
+        return True
+    # threads of other styles which are already waiting go first, so a busy style cannot starve them
+    waiting_others = sum(count for name, count in _style_state['waiting'].items() if name != style)
+    return _style_state['style'] == style and waiting_others == 0
+
+
+@contextmanager
+def style_context(style: str):
+    if getattr(_thread_styles, 'depth', 0):
+        # a plot drawn into a figure which is already being built keeps the style of that figure
+        _thread_styles.depth += 1
+        try:
+            yield
+        finally:
+            _thread_styles.depth -= 1
+        return
+
+    with _style_condition:
+        _style_state['waiting'][style] += 1
+        _style_condition.wait_for(lambda: can_apply_style(style))
+        _style_state['waiting'][style] -= 1
+        if _style_state['holders'] == 0:
+            _style_state['restore'] = matplotlib.rcParams.copy()
+            dict.update(matplotlib.rcParams, get_style_params(style))
+            _style_state['style'] = style
+        _style_state['holders'] += 1
+    _thread_styles.depth, _thread_styles.style = 1, style
+    try:
+        yield
+    finally:
+        _thread_styles.depth, _thread_styles.style = 0, None
+        with _style_condition:
+            _style_state['holders'] -= 1
+            if _style_state['holders'] == 0:
+                dict.update(matplotlib.rcParams, _style_state['restore'])
+                _style_state['style'] = None
+                _style_condition.notify_all()
+
+
+def saved_figure_style(fig: Figure):
+    # rcParams are also read while a figure is drawn for savefig, so it is saved under the style it was built with
+    style = _figure_styles.get(fig)
+    return nullcontext() if style is None else style_context(style)
+
+
+def figure_style(style: str) -> Callable:
+    def decorator(plot_fn: Callable) -> Callable:
+        @wraps(plot_fn)
+        def wrapper(*args, **kwargs):
+            with style_context(style):
+                return plot_fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def new_figure(**figure_kwargs) -> Figure:
+    # the figure is not registered with pyplot, so nothing keeps it alive once it is closed and dropped
+    fig = Figure(**figure_kwargs)
+    FigureCanvasAgg(fig)
+    _live_figures.add(fig)
+    style = getattr(_thread_styles, 'style', None)
+    if style is not None:
+        _figure_styles[fig] = style
+    return fig
+
+
+def close_figure(fig: Figure):
+    fig.clear()
+    _live_figures.discard(fig)
+
+
+def get_process_memory_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    # peak instead of current usage where /proc is not available, windows has neither
+    try:
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def get_figure_stats() -> dict:
+    return {
+        'live_figures': len(_live_figures),
+        'memory_bytes': get_process_memory_bytes(),
+    }
@@ -0,0 +1,76 @@
+import random
+import threading
+import time
+import gspread
+import httplib2
+from typing import Callable
+from google.auth.transport.requests import AuthorizedSession, Request
+from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from gspread.exceptions import APIError
+
+GOOGLE_API_SCOPES = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+
+
+class GoogleClientProvider:
+    def __init__(self, service_account_info: dict, scopes=GOOGLE_API_SCOPES):
+        self._credentials = Credentials.from_service_account_info(service_account_info, scopes=scopes)
+        self._lock = threading.Lock()
+        self._thread_local = threading.local()
+        self._gspread_client = None
+
+    def get_credentials(self) -> Credentials:
+        # one token is shared by every client and only exchanged again once it has expired
+        with self._lock:
+            if not self._credentials.valid:
+                self._credentials.refresh(Request())
+        return self._credentials
+
+    def get_gspread_client(self) -> gspread.Client:
+        with self._lock:
+            if self._gspread_client is None:
+                self._gspread_client = gspread.Client(
+                    auth=self._credentials, session=AuthorizedSession(self._credentials)
+                )
+        self.get_credentials()
+        return self._gspread_client
+
+    def get_drive_service(self):
+        # httplib2 connections are not thread safe, so every thread keeps its own keep-alive connection
+        drive_service = getattr(self._thread_local, 'drive_service', None)
+        if drive_service is None:
+            http = AuthorizedHttp(self._credentials, http=httplib2.Http())
+            drive_service = build('drive', 'v3', http=http, cache_discovery=False)
+            self._thread_local.drive_service = drive_service
+        self.get_credentials()
+        return drive_service
+
+
+def get_error_status(error: Exception) -> int:
+    if isinstance(error, APIError):
+        return error.response.status_code
+    return int(error.resp.status)
+
+
+def get_retry_after(error: Exception):
+    headers = error.response.headers if isinstance(error, APIError) else error.resp
+    retry_after = headers.get('retry-after')
+    return float(retry_after) if retry_after and retry_after.isdigit() else None
+
+
+def execute_with_backoff(request_fn: Callable, max_retries=MAX_RETRIES):
+    for attempt in range(max_retries + 1):
+        try:
+            return request_fn()
+        except (APIError, HttpError) as error:
+            if attempt == max_retries or get_error_status(error) not in RETRY_STATUS_CODES:
+                raise
+            delay = get_retry_after(error)
+            if delay is None:
+                delay = BACKOFF_BASE_SECONDS * 2 ** attempt + random.uniform(0, BACKOFF_BASE_SECONDS)
+            time.sleep(delay)
@@ -0,0 +1,59 @@
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from pages.helpers.cache import read_cached_table, write_cached_table
+from pages.helpers.constants import GPS_SCHEMA, GPS_COLUMN_RENAMES, GPS_CSV_BLOCK_SIZE, GPS_CACHE_NAME
+from pages.helpers.google_api import execute_with_backoff
+
+
+def read_gps_csv(source, block_size=GPS_CSV_BLOCK_SIZE) -> pa.Table:
+    # the whole export is kept as one table, only the declared columns are converted, straight to their final types
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=list(GPS_SCHEMA),
+            column_types={column: pa.type_for_alias(dtype) for column, dtype in GPS_SCHEMA.items()},
+        ),
+    )
+    table = reader.read_all()
+    return table.rename_columns([GPS_COLUMN_RENAMES.get(column, column) for column in table.column_names])
+
+
+def get_drive_file_version(drive_file: dict) -> dict:
+    return {
+        'id': drive_file['id'],
+        'modified_time': drive_file.get('modifiedTime'),
+        'md5_checksum': drive_file.get('md5Checksum'),
+    }
+
+
+def load_drive_csv(drive_service, drive_file: dict, cache_name: str) -> pa.Table:
+    cached_table, meta = read_cached_table(cache_name)
+    file_version = get_drive_file_version(drive_file)
+    if cached_table is not None and meta.get('drive_file') == file_version and meta.get('schema') == GPS_SCHEMA:
+        return cached_table
+
+    request = drive_service.files().get_media(fileId=drive_file['id'])
+    content = execute_with_backoff(request.execute)
+    table = read_gps_csv(pa.BufferReader(content))
+    write_cached_table(cache_name, table, {'drive_file': file_version, 'schema': GPS_SCHEMA})
+    return table
+
+
+def load_gps_export(drive_service, file_name: str, folder_id: str) -> pa.Table:
+    # only the file metadata is requested here, the content is downloaded when it has changed
+    request = drive_service.files().list(
+        q=f"name='{file_name}' and parents in '{folder_id}'",
+        fields='files(id, name, modifiedTime, md5Checksum)'
+    )
+    resulting_files = execute_with_backoff(request.execute).get('files', [])
+    return load_drive_csv(drive_service, resulting_files[0], GPS_CACHE_NAME)
+
+
+def read_gps_file(path: str) -> pa.Table:
+    # local copies are either the raw export or the parquet cache written by load_drive_csv
+    if path.endswith('.parquet'):
+        return pq.read_table(path)
+    return read_gps_csv(path)
@@ -0,0 +1,72 @@
+import threading
+import pandas as pd
+import pyarrow as pa
+from functools import partial
+from typing import Optional, Sequence
+
+from pages.helpers.calendar_dimension import build_calendar_for_dates, read_calendar_columns
+
+
+def derive_date(dataset: 'GpsDataset') -> pa.Array:
+    return pa.array(pd.to_datetime(dataset.view(['date_time']).date_time).dt.date, type=pa.date32())
+
+
+def derive_calendar_column(dataset: 'GpsDataset', column: str) -> pa.Array:
+    dates_df = dataset.view(['date', 'is_match'])
+    dates = pd.to_datetime(dates_df.date)
+    calendar_df = build_calendar_for_dates(dates, match_dates=dates_df.date[dates_df.is_match.astype(bool)])
+    return pa.array(read_calendar_columns(calendar_df, dates, [column])[column], from_pandas=True)
+
+
+GPS_DERIVED_COLUMNS = {
+    'date': derive_date,
+    'week': partial(derive_calendar_column, column='week'),
+    'year': partial(derive_calendar_column, column='year'),
+    'match_week': partial(derive_calendar_column, column='match_week'),
+}
+
+
+class GpsDataset:
+    # one physical copy of the export is shared by every session, pages only ever receive read-only views of it
+
+    def __init__(self, table: pa.Table, derived_columns: Optional[dict] = None):
+        self._table = table
+        self._derived_columns = GPS_DERIVED_COLUMNS if derived_columns is None else derived_columns
+        self._derived = {}
+        self._views = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self._table.num_rows
+
+    @property
+    def table(self) -> pa.Table:
+        return self._table
+
+    @property
+    def column_names(self) -> list:
+        derived_columns = [column for column in self._derived_columns if column not in self._table.column_names]
+        return self._table.column_names + derived_columns
+
+    def column(self, name: str):
+        if name in self._table.column_names:
+            return self._table.column(name)
+        with self._lock:
+            if name not in self._derived:
+                if name not in self._derived_columns:
+                    raise KeyError(name)
+                # derived columns are computed once per dataset, on the first view which asks for them
+                self._derived[name] = self._derived_columns[name](self)
+            return self._derived[name]
+
+    def view(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        key = tuple(self._table.column_names if columns is None else columns)
+        with self._lock:
+            view_df = self._views.get(key)
+            if view_df is None:
+                # the projected table shares the buffers of the dataset, split blocks keep pandas from copying them,
+                # so numeric columns without gaps stay read-only views of the arrow buffers
+                table = pa.table({column: self.column(column) for column in key})
+                view_df = table.to_pandas(split_blocks=True)
+                self._views[key] = view_df
+            return view_df
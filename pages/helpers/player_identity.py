@@ -0,0 +1,88 @@
+import difflib
+import unicodedata
+import cyrtranslit
+import pandas as pd
+from collections import namedtuple
+from functools import lru_cache
+
+from pages.helpers.cache import read_cached_frame, write_cached_frame
+from pages.helpers.constants import PLAYER_NAME_ALIASES, PLAYER_NAME_MATCH_CUTOFF, PLAYER_IDENTITY_CACHE_NAME, \
+    PLAYER_IDENTITY_CACHE_VERSION, RPE_GPS_JOIN_TOLERANCE_DAYS
+
+# names is indexed by the rpe name and holds the matched GPS athlete and how it was matched
+PlayerIdentityIndex = namedtuple('PlayerIdentityIndex', ['athletes', 'names'])
+NAME_KEY_TRANSLATION = str.maketrans({'Đ': 'DJ', 'Ø': 'O', 'Ł': 'L', 'ß': 'SS'})
+
+
+@lru_cache(maxsize=None)
+def normalize_name_key(name: str) -> str:
+    name = cyrtranslit.to_latin(name, 'ru').upper().translate(NAME_KEY_TRANSLATION)
+    name = ''.join(char for char in unicodedata.normalize('NFKD', name) if not unicodedata.combining(char))
+    # tokens are sorted so 'surname name' and 'name surname' share a key
+    tokens = ''.join(char if char.isalnum() else ' ' for char in name).split()
+    return ' '.join(sorted(tokens))
+
+
+def match_player_names(names, athletes, aliases=PLAYER_NAME_ALIASES,
+                       cutoff=PLAYER_NAME_MATCH_CUTOFF) -> pd.DataFrame:
+    athlete_keys = {normalize_name_key(athlete): athlete for athlete in athletes}
+    alias_keys = {normalize_name_key(alias): athlete for alias, athlete in aliases.items() if athlete in athletes}
+
+    matches = []
+    for name in names:
+        key = normalize_name_key(name)
+        if key in alias_keys:
+            matches.append((name, alias_keys[key], 'alias'))
+        elif key in athlete_keys:
+            matches.append((name, athlete_keys[key], 'exact'))
+        else:
+            close_keys = difflib.get_close_matches(key, athlete_keys, n=1, cutoff=cutoff)
+            matches.append((name, athlete_keys[close_keys[0]], 'fuzzy') if close_keys else (name, None, 'unmatched'))
+    return pd.DataFrame(matches, columns=['name', 'athlete', 'method']).set_index('name')
+
+
+def load_identity_index(names, athletes, index: PlayerIdentityIndex = None) -> PlayerIdentityIndex:
+    athletes = tuple(sorted(athletes))
+    if index is None or index.athletes != athletes:
+        # matches only hold as long as the athletes and aliases they were made against
+        cached_df, meta = read_cached_frame(PLAYER_IDENTITY_CACHE_NAME)
+        is_valid = meta.get('version') == PLAYER_IDENTITY_CACHE_VERSION and \
+            tuple(meta.get('athletes', ())) == athletes and meta.get('aliases') == PLAYER_NAME_ALIASES
+        names_df = cached_df.set_index('name') if is_valid else pd.DataFrame(columns=['athlete', 'method'])
+        index = PlayerIdentityIndex(athletes=athletes, names=names_df)
+
+    new_names = pd.Index(names).unique().difference(index.names.index)
+    if new_names.empty:
+        return index
+
+    # only names which were never seen are matched, fuzzy matching every rerun would not scale with the squad
+    names_df = pd.concat([index.names, match_player_names(new_names, athletes)])
+    write_cached_frame(PLAYER_IDENTITY_CACHE_NAME, names_df.rename_axis('name').reset_index(), {
+        'version': PLAYER_IDENTITY_CACHE_VERSION,
+        'athletes': list(athletes),
+        'aliases': PLAYER_NAME_ALIASES,
+    })
+    return PlayerIdentityIndex(athletes=athletes, names=names_df)
+
+
+def join_rpe_to_gps_sessions(rpe_df: pd.DataFrame, index: PlayerIdentityIndex, sessions: pd.Series,
+                             tolerance_days=RPE_GPS_JOIN_TOLERANCE_DAYS) -> pd.DataFrame:
+    rpe_df = rpe_df.assign(
+        athlete=rpe_df.name.map(index.names.athlete).astype(object),
+        date=pd.to_datetime(rpe_df.session_date).astype('datetime64[ns]'),
+    )
+    sessions_df = sessions.reset_index()
+    sessions_df = sessions_df.assign(
+        athlete=sessions_df.athlete.astype(object),
+        gps_date=sessions_df.date.astype('datetime64[ns]'),
+    ).drop(columns='date').sort_values('gps_date', kind='stable')
+
+    # every answer gets the nearest GPS session of the same athlete, a late answer dated the day after still matches
+    matched = rpe_df.athlete.notna()
+    joined_df = pd.merge_asof(
+        rpe_df[matched].reset_index().sort_values('date', kind='stable'), sessions_df,
+        left_on='date', right_on='gps_date', by='athlete', direction='nearest',
+        tolerance=pd.Timedelta(days=tolerance_days),
+    ).set_index('index')
+    joined_df = pd.concat([joined_df, rpe_df[~matched]]).sort_index()
+    return joined_df.rename_axis(rpe_df.index.name)
@@ -0,0 +1,165 @@
+import io
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+from pages.helpers.constants import RENDER_CACHE_MAX_BYTES, RENDER_CACHE_MAX_ENTRIES
+from pages.helpers.figures import close_figure, saved_figure_style
+from pages.helpers.timing import timed_stage
+
+# same options st.pyplot uses, so cached images look exactly like the ones it renders
+DISPLAY_PNG_KWARGS = {'format': 'png', 'bbox_inches': 'tight', 'dpi': 200}
+DOWNLOAD_PNG_KWARGS = {'format': 'png', 'facecolor': 'auto'}
+PDF_REPORT_KWARGS = {'format': 'pdf'}
+
+
+class FigureRenderCache:
+    def __init__(self, max_bytes=RENDER_CACHE_MAX_BYTES, max_entries=RENDER_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def peek(self, key: str) -> Optional[bytes]:
+        # unlike get, a lookup for a variant nobody asked for yet does not count as a miss
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._size,
+            }
+
+
+figure_render_cache = FigureRenderCache()
+
+
+def hash_plot_argument(value, digest):
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest.update(repr(getattr(value, 'columns', getattr(value, 'name', None))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index)).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype, value.shape)).encode())
+        digest.update(pd.util.hash_array(value.ravel()).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            hash_plot_argument(item, digest)
+    elif isinstance(value, dict):
+        for item_key in sorted(value, key=repr):
+            digest.update(repr(item_key).encode())
+            hash_plot_argument(value[item_key], digest)
+    elif callable(value):
+        digest.update(f'{value.__module__}.{value.__qualname__}'.encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def make_render_key(plot_fn: Callable, args: tuple, kwargs: dict, savefig_kwargs: dict) -> str:
+    digest = hashlib.sha256()
+    for value in (plot_fn, args, kwargs, savefig_kwargs):
+        hash_plot_argument(value, digest)
+    return digest.hexdigest()
+
+
+def render_figure(fig: Figure, **savefig_kwargs) -> bytes:
+    buffer = io.BytesIO()
+    with saved_figure_style(fig):
+        fig.savefig(buffer, **savefig_kwargs)
+    return buffer.getvalue()
+
+
+def get_rendered_plot(plot_fn: Callable, *args, savefig_kwargs: dict = DISPLAY_PNG_KWARGS, **kwargs) -> Optional[bytes]:
+    return figure_render_cache.peek(make_render_key(plot_fn, args, kwargs, savefig_kwargs))
+
+
+def render_plot(plot_fn: Callable, *args, variants: Dict[str, dict] = None, **kwargs) -> Dict[str, bytes]:
+    variants = variants or {'display': DISPLAY_PNG_KWARGS}
+    keys = {name: make_render_key(plot_fn, args, kwargs, savefig_kwargs) for name, savefig_kwargs in variants.items()}
+    rendered = {name: figure_render_cache.get(key) for name, key in keys.items()}
+
+    missing = [name for name, data in rendered.items() if data is None]
+    if missing:
+        # the figure is drawn once for all variants which are not cached yet
+        with timed_stage(f'draw {plot_fn.__name__}'):
+            fig = plot_fn(*args, **kwargs)
+        try:
+            for name in missing:
+                with timed_stage(f'savefig {name}'):
+                    rendered[name] = render_figure(fig, **variants[name])
+                figure_render_cache.put(keys[name], rendered[name])
+        finally:
+            close_figure(fig)
+    return rendered
+
+
+def render_figures_pdf(figures: Iterable[Figure]) -> bytes:
+    # pages are written as the figures are produced, only one figure is alive at a time for a generator
+    buffer = io.BytesIO()
+    with PdfPages(buffer) as pdf:
+        for fig in figures:
+            try:
+                with saved_figure_style(fig):
+                    pdf.savefig(fig)
+            finally:
+                close_figure(fig)
+    return buffer.getvalue()
+
+
+def get_rendered_pdf_report(figures_fn: Callable, *args, **kwargs) -> Optional[bytes]:
+    return figure_render_cache.peek(make_render_key(figures_fn, args, kwargs, PDF_REPORT_KWARGS))
+
+
+def render_pdf_report(figures_fn: Callable, *args, **kwargs) -> bytes:
+    key = make_render_key(figures_fn, args, kwargs, PDF_REPORT_KWARGS)
+    pdf_bytes = figure_render_cache.get(key)
+    if pdf_bytes is None:
+        with timed_stage(f'pdf {figures_fn.__name__}'):
+            pdf_bytes = render_figures_pdf(figures_fn(*args, **kwargs))
+        figure_render_cache.put(key, pdf_bytes)
+    return pdf_bytes
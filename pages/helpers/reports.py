@@ -0,0 +1,115 @@
+import pandas as pd
+from collections import namedtuple
+from typing import Iterator, List
+
+from pages.gps_absolute.gps_absolute_plots import REPORT_PLOTS, draw_report_plot
+from pages.gps_relative.gps_relative_helpers import MaxFeaturesIndex
+from pages.gps_relative.gps_relative_plots import create_gps_session_report_plot
+from pages.helpers.calendar_dimension import fill_daily_gaps
+from pages.helpers.constants import TEAM_ANALYSIS_METRICS
+from pages.helpers.team_aggregates import slice_daily_team_aggregates
+from pages.rpe.rpe_helpers import extract_players_rpe_mean_and_std
+from pages.rpe.rpe_plots import create_rpe_session_report_plot, create_rpe_team_report_plot
+
+# plots are (plot_fn, args) pairs, so every figure can be rendered and cached on its own
+ReportSpec = namedtuple('ReportSpec', ['title', 'plots', 'data'])
+
+
+class ReportNotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+def iter_plot_figures(plots: List[tuple]) -> Iterator:
+    for plot_fn, args in plots:
+        yield plot_fn(*args)
+
+
+def build_rpe_session_df(rpe_df: pd.DataFrame, session_date) -> pd.DataFrame:
+    session_df = rpe_df[rpe_df.session_date == session_date]
+    session_df = session_df.drop_duplicates(subset=['name', 'session_date'], keep='last')
+    return session_df.reset_index(drop=True)
+
+
+def build_rpe_team_df(rpe_df: pd.DataFrame, start_date, end_date) -> pd.DataFrame:
+    week_df = rpe_df[
+        (rpe_df.session_date >= start_date) &
+        (rpe_df.session_date <= end_date)
+        ]
+    week_df = week_df.groupby('session_date', as_index=False).agg({'rpe': ['mean', 'std']})
+    week_df.columns = week_df.columns.droplevel()
+    week_df = week_df.rename(columns={'': 'session_date', 'mean': 'rpe_mean', 'std': 'rpe_std'})
+    week_df.rpe_mean = week_df.rpe_mean.round(2)
+    week_df.rpe_std = week_df.rpe_std.round(2)
+    return fill_daily_gaps(week_df, 'session_date', week_df.session_date.iloc[0], week_df.session_date.iloc[-1])
+
+
+def build_rpe_session_report(rpe_df: pd.DataFrame, baselines_df: pd.DataFrame, session_date) -> ReportSpec:
+    session_df = build_rpe_session_df(rpe_df, session_date)
+    if session_df.empty:
+        raise ReportNotFound(f'No RPE answers for {session_date}')
+
+    players = session_df.name.unique()
+    session_values = session_df.rpe.values
+    means, stds = extract_players_rpe_mean_and_std(session_df, baselines_df)
+    return ReportSpec(
+        title=f'RPE_session_report_{session_date}',
+        plots=[(create_rpe_session_report_plot, (players, session_values, session_date))],
+        data=pd.DataFrame({'name': players, 'rpe': session_values, 'rpe_mean': means, 'rpe_std': stds}),
+    )
+
+
+def build_rpe_team_report(rpe_df: pd.DataFrame, start_date, end_date) -> ReportSpec:
+    if not ((rpe_df.session_date >= start_date) & (rpe_df.session_date <= end_date)).any():
+        raise ReportNotFound(f'No RPE answers between {start_date} and {end_date}')
+
+    week_df = build_rpe_team_df(rpe_df, start_date, end_date)
+    title = f'RPE team report {start_date.strftime("%d.%m.%y")}-{end_date.strftime("%d.%m.%y")}'
+    return ReportSpec(title=title, plots=[(create_rpe_team_report_plot, (week_df, title))], data=week_df)
+
+
+def build_gps_session_report(gps_df: pd.DataFrame, max_index: MaxFeaturesIndex, session_date_time: str) -> ReportSpec:
+    session_df = gps_df[gps_df.date_time == session_date_time].reset_index(drop=True)
+    if session_df.empty:
+        raise ReportNotFound(f'No GPS session at {session_date_time}')
+
+    players = session_df.athlete.unique()
+    return ReportSpec(
+        title=f'session_report_{session_date_time}',
+        plots=[(create_gps_session_report_plot, (players, session_df, max_index))],
+        data=session_df,
+    )
+
+
+def build_gps_team_report(team_aggregates_df: pd.DataFrame, start_date, end_date) -> ReportSpec:
+    team_df = slice_daily_team_aggregates(team_aggregates_df, start_date, end_date, TEAM_ANALYSIS_METRICS).fillna(0)
+    if team_df.empty:
+        raise ReportNotFound(f'No GPS sessions between {start_date} and {end_date}')
+
+    title = f'Team {start_date}_{end_date}'
+    return ReportSpec(
+        title=title,
+        plots=[(draw_report_plot, (plot_fn, team_df, title)) for plot_fn in REPORT_PLOTS],
+        data=team_df,
+    )
+
+
+def build_gps_player_df(gps_df: pd.DataFrame, player: str, start_date, end_date) -> pd.DataFrame:
+    player_df = gps_df[gps_df.athlete == player]
+    player_df = player_df.assign(date=pd.to_datetime(player_df.date_time).dt.date)
+    return player_df[(player_df.date >= start_date) & (player_df.date <= end_date)]
+
+
+def build_gps_player_report(gps_df: pd.DataFrame, player: str, start_date, end_date) -> ReportSpec:
+    player_df = build_gps_player_df(gps_df, player, start_date, end_date)
+    if player_df.empty:
+        raise ReportNotFound(f'No GPS sessions of {player} between {start_date} and {end_date}')
+
+    return ReportSpec(
+        title=f'{player}_performance_{start_date}_{end_date}',
+        plots=[(draw_report_plot, (plot_fn, player_df, player)) for plot_fn in REPORT_PLOTS],
+        data=player_df,
+    )
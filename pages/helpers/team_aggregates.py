@@ -0,0 +1,36 @@
+import pandas as pd
+
+from pages.helpers.constants import GPS_METRICS
+
+
+def build_daily_team_aggregates(df: pd.DataFrame, metrics=GPS_METRICS) -> pd.DataFrame:
+    dates = pd.to_datetime(df.date_time).dt.normalize().rename('date')
+    grouped = df.groupby(dates)
+    return pd.concat([
+        grouped[metrics].mean().add_suffix('_mean'),
+        grouped[metrics].sum().add_suffix('_sum'),
+        grouped[metrics].count().add_suffix('_count'),
+        grouped.athlete.count().rename('athlete_count'),
+        grouped.is_match.first(),
+    ], axis=1).sort_index()
+
+
+def update_daily_team_aggregates(team_aggregates_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    metrics = [column[:-len('_sum')] for column in team_aggregates_df.columns if column.endswith('_sum')]
+    new_aggregates_df = build_daily_team_aggregates(new_df, metrics)
+    # a later session of an already aggregated day is merged through the sums and counts, the means follow from them
+    grouped = pd.concat([team_aggregates_df, new_aggregates_df]).groupby(level='date')
+    additive_columns = [f'{metric}_{suffix}' for suffix in ('sum', 'count') for metric in metrics] + ['athlete_count']
+    merged_df = pd.concat([grouped[additive_columns].sum(), grouped.is_match.first()], axis=1)
+    sums_df = merged_df[[f'{metric}_sum' for metric in metrics]].set_axis(metrics, axis=1)
+    counts_df = merged_df[[f'{metric}_count' for metric in metrics]].set_axis(metrics, axis=1)
+    means_df = (sums_df / counts_df.where(counts_df > 0)).add_suffix('_mean')
+    return pd.concat([merged_df, means_df], axis=1)[team_aggregates_df.columns].sort_index()
+
+
+def slice_daily_team_aggregates(team_aggregates_df: pd.DataFrame, start_date, end_date, metrics) -> pd.DataFrame:
+    team_df = team_aggregates_df.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)]
+    team_df = team_df[[f'{metric}_mean' for metric in metrics] + ['athlete_count', 'is_match']]
+    team_df.columns = list(metrics) + ['athlete', 'is_match']
+    team_df.insert(0, 'date', team_df.index.date)
+    return team_df.reset_index(drop=True)
@@ -0,0 +1,92 @@
+import io
+import csv
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from functools import wraps
+from typing import Callable, List
+
+from pages.helpers.constants import TIMING_LOG_MAX_ENTRIES
+
+TIMING_LOG_COLUMNS = ['rerun_started_at', 'page', 'stage', 'depth', 'seconds']
+
+_rerun_state = threading.local()
+_timing_log = deque(maxlen=TIMING_LOG_MAX_ENTRIES)
+_timing_log_lock = threading.Lock()
+_disabled_stage = nullcontext()
+
+
+def start_rerun(page: str, enabled: bool):
+    # every streamlit rerun runs on its own script thread, so the records of concurrent sessions never mix
+    _rerun_state.enabled = enabled
+    _rerun_state.page = page
+    _rerun_state.started_at = datetime.now().isoformat(timespec='seconds')
+    _rerun_state.records = []
+    _rerun_state.depth = 0
+
+
+def is_timing_enabled() -> bool:
+    return getattr(_rerun_state, 'enabled', False)
+
+
+@contextmanager
+def _timed_stage(name: str):
+    # the record is added when the stage starts, so nested stages are listed below their parent
+    record = {
+        'rerun_started_at': _rerun_state.started_at,
+        'page': _rerun_state.page,
+        'stage': name,
+        'depth': _rerun_state.depth,
+        'seconds': None,
+    }
+    _rerun_state.records.append(record)
+    _rerun_state.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        _rerun_state.depth = record['depth']
+
+
+def timed_stage(name: str):
+    return _timed_stage(name) if is_timing_enabled() else _disabled_stage
+
+
+def timed(name: str = None) -> Callable:
+    def decorator(fn: Callable) -> Callable:
+        stage_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_timing_enabled():
+                return fn(*args, **kwargs)
+            with _timed_stage(stage_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def finish_rerun() -> List[dict]:
+    if not is_timing_enabled():
+        return []
+    records = _rerun_state.records
+    with _timing_log_lock:
+        _timing_log.extend(records)
+    _rerun_state.enabled = False
+    return records
+
+
+def get_timing_log() -> List[dict]:
+    with _timing_log_lock:
+        return list(_timing_log)
+
+
+def timing_log_to_csv(records: List[dict]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=TIMING_LOG_COLUMNS)
+    writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue().encode()
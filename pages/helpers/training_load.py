@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from collections import namedtuple
+
+from pages.helpers.constants import ACUTE_LOAD_DAYS, CHRONIC_LOAD_DAYS
+from pages.helpers.player_identity import PlayerIdentityIndex, join_rpe_to_gps_sessions
+
+# every metric is a date x player frame over the same daily index as daily
+TrainingLoad = namedtuple('TrainingLoad', [
+    'sessions', 'daily', 'weekly_load', 'monotony', 'strain', 'acwr', 'ewma_acute', 'ewma_chronic', 'ewma_acwr'
+])
+LOAD_METRICS = ['daily', 'weekly_load', 'monotony', 'strain', 'acwr', 'ewma_acute', 'ewma_chronic', 'ewma_acwr']
+
+
+def build_session_durations(gps_df: pd.DataFrame) -> pd.Series:
+    dates = pd.to_datetime(gps_df.date_time).dt.normalize()
+    return gps_df.duration_min.groupby([gps_df.athlete, dates.rename('date')]).sum()
+
+
+def update_session_durations(durations: pd.Series, new_gps_df: pd.DataFrame) -> pd.Series:
+    return pd.concat([durations, build_session_durations(new_gps_df)]).groupby(level=['athlete', 'date']).sum()
+
+
+def build_srpe_df(rpe_df: pd.DataFrame, identity_index: PlayerIdentityIndex, durations: pd.Series) -> pd.DataFrame:
+    srpe_df = join_rpe_to_gps_sessions(rpe_df[['name', 'session_date', 'rpe']], identity_index, durations)
+    # answers without a tracked session take the squad median of that day, days without any GPS session carry no load
+    day_median = srpe_df.groupby('date').duration_min.transform('median')
+    srpe_df = srpe_df.assign(duration_min=srpe_df.duration_min.fillna(day_median))
+    # load is kept per GPS athlete, so differently typed names of one player share it, unmatched names stay on their own
+    srpe_df = srpe_df.assign(srpe=srpe_df.rpe * srpe_df.duration_min, player=srpe_df.athlete.fillna(srpe_df.name))
+    return srpe_df.drop_duplicates(['player', 'date'], keep='last')
+
+
+def build_daily_load(srpe_df: pd.DataFrame) -> pd.DataFrame:
+    daily_df = srpe_df.pivot_table(index='date', columns='player', values='srpe', aggfunc='sum')
+    daily_index = pd.date_range(srpe_df.date.min(), srpe_df.date.max(), freq='D')
+    return daily_df.reindex(daily_index).fillna(0).sort_index(axis=1)
+
+
+def compute_ewma(daily_df: pd.DataFrame, days: int, state: pd.Series = None) -> pd.DataFrame:
+    if state is None:
+        return daily_df.ewm(alpha=2 / (days + 1), adjust=False).mean()
+    # the previous value is prepended, without adjustment it is carried on exactly like the first day of a build
+    seeded_df = pd.concat([state.to_frame().T, daily_df])
+    return seeded_df.ewm(alpha=2 / (days + 1), adjust=False).mean().iloc[1:]
+
+
+def compute_load_metrics(daily_df: pd.DataFrame, from_position=0, ewma_acute_state=None,
+                         ewma_chronic_state=None) -> dict:
+    # rolling windows look back over the chronic window, the ewma continues from the state of the day before
+    window_df = daily_df.iloc[max(0, from_position - CHRONIC_LOAD_DAYS + 1):]
+    acute = window_df.rolling(ACUTE_LOAD_DAYS).mean()
+    acute_std = window_df.rolling(ACUTE_LOAD_DAYS).std()
+    chronic = window_df.rolling(CHRONIC_LOAD_DAYS).mean()
+    weekly_load = window_df.rolling(ACUTE_LOAD_DAYS).sum()
+    monotony = (acute / acute_std).where(acute_std > 0)
+
+    ewma_acute = compute_ewma(daily_df.iloc[from_position:], ACUTE_LOAD_DAYS, ewma_acute_state)
+    ewma_chronic = compute_ewma(daily_df.iloc[from_position:], CHRONIC_LOAD_DAYS, ewma_chronic_state)
+
+    start_date = daily_df.index[from_position]
+    return {
+        'daily': daily_df.iloc[from_position:],
+        'weekly_load': weekly_load.loc[start_date:],
+        'monotony': monotony.loc[start_date:],
+        'strain': (weekly_load * monotony).loc[start_date:],
+        'acwr': (acute / chronic).where(chronic > 0).loc[start_date:],
+        'ewma_acute': ewma_acute,
+        'ewma_chronic': ewma_chronic,
+        'ewma_acwr': (ewma_acute / ewma_chronic).where(ewma_chronic > 0),
+    }
+
+
+def build_training_load(srpe_df: pd.DataFrame) -> TrainingLoad:
+    return TrainingLoad(sessions=srpe_df, **compute_load_metrics(build_daily_load(srpe_df)))
+
+
+def update_training_load(load: TrainingLoad, srpe_df: pd.DataFrame) -> TrainingLoad:
+    daily_df = build_daily_load(srpe_df)
+    previous_df = load.daily
+    if not daily_df.columns.equals(previous_df.columns) or daily_df.index[0] != previous_df.index[0] or \
+            len(daily_df) < len(previous_df):
+        # a new player or changed first day shifts the whole matrix
+        return build_training_load(srpe_df)
+
+    changed_days = np.flatnonzero((daily_df.iloc[:len(previous_df)].values != previous_df.values).any(axis=1))
+    from_position = changed_days[0] if len(changed_days) else len(previous_df)
+    if from_position == len(daily_df):
+        return load._replace(sessions=srpe_df)
+
+    # only the days from the first changed one are computed again
+    ewma_states = {}
+    if from_position > 0:
+        ewma_states = {
+            'ewma_acute_state': load.ewma_acute.iloc[from_position - 1],
+            'ewma_chronic_state': load.ewma_chronic.iloc[from_position - 1],
+        }
+    new_metrics = compute_load_metrics(daily_df, from_position, **ewma_states)
+    return TrainingLoad(sessions=srpe_df, **{
+        metric: pd.concat([getattr(load, metric).iloc[:from_position], new_metrics[metric]])
+        for metric in LOAD_METRICS
+    })
+
+
+def read_squad_load(load: TrainingLoad, date) -> pd.DataFrame:
+    date = pd.Timestamp(date)
+    if date not in load.daily.index:
+        return pd.DataFrame(columns=['srpe', *LOAD_METRICS[1:]])
+    squad_df = pd.DataFrame({metric: getattr(load, metric).loc[date] for metric in LOAD_METRICS})
+    return squad_df.rename(columns={'daily': 'srpe'}).round(2)
+
+
+def read_player_sessions(load: TrainingLoad, player: str, start_date, end_date) -> pd.DataFrame:
+    sessions_df = load.sessions
+    player_df = sessions_df[
+        (sessions_df.player == player) &
+        (sessions_df.date >= pd.Timestamp(start_date)) &
+        (sessions_df.date <= pd.Timestamp(end_date))
+        ]
+    return player_df.sort_values('date')[['session_date', 'rpe', 'duration_min', 'srpe']].rename(
+        columns={'session_date': 'date'}
+    ).reset_index(drop=True)
@@ -1,14 +1,30 @@
-import io
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
 from PIL import Image
-from io import StringIO
+from typing import Callable
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
-from matplotlib.backends.backend_pdf import PdfPages
 from streamlit_authenticator import Authenticate
-from googleapiclient.discovery import build
-from oauth2client.service_account import ServiceAccountCredentials
+
+from pages.gps_relative.gps_relative_helpers import MaxFeaturesIndex, build_max_features_index, \
+    update_max_features_index, TopKReference, build_top_k_reference, update_top_k_reference, RelativeRollups, \
+    build_relative_rollups, update_relative_rollups, get_reference_values
+from pages.helpers.cache import refresh_derived_store, refresh_dependent_store
+from pages.helpers.constants import RPE_CACHE_TTL_SECONDS, GPS_REFERENCE_TOP_K, GPS_DATA_TTL_SECONDS, \
+    INTERACTIVE_CHART_MIN_DAYS, DATA_FETCH_TIMEOUT_SECONDS
+from pages.helpers.data_sources import DataSource, load_gps_data, load_rpe_frames, load_cached_gps_data, \
+    load_cached_rpe_frames, fetch_data_sources
+from pages.helpers.figures import get_figure_stats
+from pages.helpers.google_api import GoogleClientProvider
+from pages.helpers.gps_dataset import GpsDataset
+from pages.helpers.player_identity import PlayerIdentityIndex, load_identity_index
+from pages.helpers.render_cache import DOWNLOAD_PNG_KWARGS, get_rendered_plot, render_plot, get_rendered_pdf_report, \
+    render_pdf_report
+from pages.helpers.team_aggregates import build_daily_team_aggregates, update_daily_team_aggregates
+from pages.helpers.timing import start_rerun, finish_rerun, get_timing_log, timing_log_to_csv, timed_stage, \
+    timed
+from pages.helpers.training_load import TrainingLoad, build_session_durations, update_session_durations, \
+    build_srpe_df, build_training_load, update_training_load
 
 
 def authenticate():
@@ -42,9 +58,15 @@ def authenticate():
         st.warning('Please enter your username and password')
 
 
-def add_download_image_button(fig: plt.Figure, button_text: str, filename: str, bbox_inches=None):
-    img = io.BytesIO()
-    fig.savefig(img, format='png', facecolor=fig.get_facecolor(), bbox_inches=bbox_inches)
+def add_download_image_button(button_text: str, filename: str, plot_fn: Callable, *args,
+                              savefig_kwargs: dict = DOWNLOAD_PNG_KWARGS, **kwargs):
+    # the download image is only rendered once somebody asks for it, later reruns reuse the cached bytes
+    img = get_rendered_plot(plot_fn, *args, savefig_kwargs=savefig_kwargs, **kwargs)
+    if img is None:
+        if not st.button(f'Prepare {button_text.lower()}', key=f'prepare_{filename}'):
+            return
+        with timed_stage(f'download {filename}'):
+            img = render_plot(plot_fn, *args, variants={'download': savefig_kwargs}, **kwargs)['download']
 
     btn = st.download_button(
         label=button_text,
@@ -54,35 +76,151 @@ def add_download_image_button(fig: plt.Figure, button_text: str, filename: str,
     )
 
 
-number_of_seconds_to_keep = 60 * 60 * 12
-
-
-@st.cache_resource(ttl=number_of_seconds_to_keep)
-def load_google_drive_data() -> pd.DataFrame:
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_dict({
-        "type": st.secrets.google_api.type,
-        "project_id": st.secrets.google_api.project_id,
-        "private_key_id": st.secrets.google_api.private_key_id,
-        "private_key": st.secrets.google_api.private_key,
-        "client_email": st.secrets.google_api.client_email,
-        "client_id": st.secrets.google_api.client_id,
-        "auth_uri": st.secrets.google_api.auth_uri,
-        "token_uri": st.secrets.google_api.token_uri,
-        "auth_provider_x509_cert_url": st.secrets.google_api.auth_provider_x509_cert_url,
-        "client_x509_cert_url": st.secrets.google_api.client_x509_cert_url,
-    }, scope)
-    drive_service = build('drive', 'v3', credentials=creds)
-
-    results = drive_service.files().list(
-        q=f"name='{st.secrets.google_drive.gps_file_name}' and parents in '{st.secrets.google_drive.gps_folder_id}'"
-    ).execute()
-    resulting_files = results.get('files', [])
-    request = drive_service.files().get_media(fileId=resulting_files[0]['id'])
-    content = request.execute()
-    csv_data = StringIO(content.decode('utf-8'))
-    df = pd.read_csv(csv_data)
-    return df
+DATA_SOURCE_LABELS = {'gps': 'GPS export', 'rpe': 'RPE sheet'}
+
+
+@st.cache_resource
+def get_google_client_provider() -> GoogleClientProvider:
+    return GoogleClientProvider(dict(st.secrets.google_api))
+
+
+def get_data_sources() -> dict:
+    # the fetches run on worker threads, so everything they need is read from st.secrets up front
+    provider = get_google_client_provider()
+    google_drive_config = dict(st.secrets.google_drive)
+    rpe_sheet_name = st.secrets.google_sheets.rpe_sheet_name
+    return {
+        'gps': DataSource(
+            lambda force_refresh: load_gps_data(provider, google_drive_config),
+            GPS_DATA_TTL_SECONDS, load_cached_gps_data
+        ),
+        'rpe': DataSource(
+            lambda force_refresh: load_rpe_frames(
+                provider, rpe_sheet_name, RPE_CACHE_TTL_SECONDS, force_refresh=force_refresh
+            ),
+            RPE_CACHE_TTL_SECONDS, load_cached_rpe_frames
+        ),
+    }
+
+
+def fetch_page_data(*names: str, refresh=()) -> dict:
+    sources = get_data_sources()
+    return fetch_data_sources({name: sources[name] for name in names}, DATA_FETCH_TIMEOUT_SECONDS, refresh)
+
+
+def load_page_data(*names: str, refresh=()) -> tuple:
+    # called once at the top of a page, so every source the page needs is fetched at the same time
+    try:
+        fetched = fetch_page_data(*names, refresh=refresh)
+    except FutureTimeoutError:
+        # the very first load is still running and there is no copy to show yet
+        st.info('The data is still loading for the first time, refresh the page shortly.')
+        st.stop()
+    for name in names:
+        if fetched[name].error is not None:
+            st.sidebar.error(f'Loading the {DATA_SOURCE_LABELS[name]} failed, showing the last loaded copy.')
+        elif fetched[name].is_stale:
+            st.sidebar.warning(f'The {DATA_SOURCE_LABELS[name]} is still loading, showing the last loaded copy.')
+    return tuple(fetched[name].value for name in names)
+
+
+@timed()
+def load_gps_max_features_index(gps_dataset: GpsDataset) -> MaxFeaturesIndex:
+    # derived stores take the dataset the page loaded, the full view is memoized so they see the same frame
+    return refresh_derived_store(
+        'gps_max_features', gps_dataset.view(), 'date_time',
+        build_max_features_index, update_max_features_index
+    )
+
+
+@timed()
+def load_gps_team_aggregates(gps_dataset: GpsDataset) -> pd.DataFrame:
+    return refresh_derived_store(
+        'gps_team_aggregates', gps_dataset.view(), 'date_time',
+        build_daily_team_aggregates, update_daily_team_aggregates
+    )
+
+
+@timed()
+def load_gps_top_k_reference(gps_dataset: GpsDataset, k=GPS_REFERENCE_TOP_K) -> TopKReference:
+    return refresh_derived_store(
+        f'gps_top_{k}_reference', gps_dataset.view(), 'date_time',
+        lambda df: build_top_k_reference(df, k=k), update_top_k_reference
+    )
+
+
+@timed()
+def load_gps_relative_rollups(gps_dataset: GpsDataset, match_reference=False) -> RelativeRollups:
+    return refresh_dependent_store(
+        f'gps_relative_rollups_{"match" if match_reference else "all"}',
+        (load_gps_team_aggregates(gps_dataset), load_gps_top_k_reference(gps_dataset)),
+        lambda team_aggregates_df, reference: build_relative_rollups(
+            team_aggregates_df, get_reference_values(reference, match_only=match_reference)
+        ),
+        lambda rollups, team_aggregates_df, reference: update_relative_rollups(
+            rollups, team_aggregates_df, get_reference_values(reference, match_only=match_reference)
+        ),
+    )
+
+
+@timed()
+def load_gps_session_durations(gps_dataset: GpsDataset) -> pd.Series:
+    return refresh_derived_store(
+        'gps_session_durations', gps_dataset.view(), 'date_time',
+        build_session_durations, update_session_durations
+    )
+
+
+@timed()
+def load_player_identity_index(rpe_df: pd.DataFrame, gps_dataset: GpsDataset) -> PlayerIdentityIndex:
+    return refresh_dependent_store(
+        'player_identity', (rpe_df, gps_dataset.view()),
+        lambda rpe_df, gps_df: load_identity_index(rpe_df.name.unique(), gps_df.athlete.unique()),
+        lambda index, rpe_df, gps_df: load_identity_index(rpe_df.name.unique(), gps_df.athlete.unique(), index),
+    )
+
+
+@timed()
+def load_rpe_training_load(rpe_df: pd.DataFrame, gps_dataset: GpsDataset) -> TrainingLoad:
+    # the load matrix is diffed on a new rpe or GPS load and only recomputed from the first changed day
+    return refresh_dependent_store(
+        'rpe_training_load', (
+            rpe_df, load_player_identity_index(rpe_df, gps_dataset), load_gps_session_durations(gps_dataset)
+        ),
+        lambda *dependencies: build_training_load(build_srpe_df(*dependencies)),
+        lambda load, *dependencies: update_training_load(load, build_srpe_df(*dependencies)),
+    )
+
+
+def use_interactive_charts(start_date, end_date, key: str) -> bool:
+    # long ranges default to browser side charts, the default is part of the key so it follows the selected range
+    long_range = (end_date - start_date).days > INTERACTIVE_CHART_MIN_DAYS
+    return st.checkbox('Interactive charts', value=long_range, key=f'{key}_interactive_{long_range}')
+
+
+def start_page_timing(page: str):
+    enabled = st.sidebar.checkbox('Show stage timings', key='show_stage_timings')
+    start_rerun(page, enabled)
+
+
+def show_page_timings():
+    records = finish_rerun()
+    if not records:
+        return
+    timings_df = pd.DataFrame(records)
+    timings_df['stage'] = ['\u2003' * depth + stage for depth, stage in zip(timings_df.depth, timings_df.stage)]
+    st.sidebar.subheader('Stage timings')
+    st.sidebar.dataframe(timings_df[['stage', 'seconds']].round(3), use_container_width=True)
+    figure_stats = get_figure_stats()
+    st.sidebar.caption(
+        f"{figure_stats['live_figures']} live figures, {figure_stats['memory_bytes'] / 2 ** 20:.0f} MB process memory"
+    )
+    st.sidebar.download_button(
+        label='Download timing log',
+        data=timing_log_to_csv(get_timing_log()),
+        file_name='stage_timings.csv',
+        mime='text/csv'
+    )
 
 
 def add_page_logo():
@@ -93,18 +231,13 @@ def add_page_logo():
     )
 
 
-def add_download_pdf_from_plots_button(button_text: str, filename: str):
-    pdf_name = 'pdf_output.pdf'
-    pdf = PdfPages(pdf_name)
-
-    for fig in range(1, plt.gcf().number + 1):
-        pdf.savefig(fig)
-        plt.close()
-    pdf.close()
-    plt.close()
-
-    with open(pdf_name, "rb") as pdf_file:
-        pdf_byte = pdf_file.read()
+def add_download_pdf_from_plots_button(button_text: str, filename: str, figures_fn: Callable, *args, **kwargs):
+    pdf_byte = get_rendered_pdf_report(figures_fn, *args, **kwargs)
+    if pdf_byte is None:
+        if not st.button(f'Prepare {button_text.lower()}', key=f'prepare_{filename}'):
+            return
+        with timed_stage(f'download {filename}'):
+            pdf_byte = render_pdf_report(figures_fn, *args, **kwargs)
 
     st.download_button(
         label=button_text,
@@ -1,13 +1,37 @@
-from datetime import timedelta
-from pages.helpers.constants import RPE_COLOR_DICT
+import re
+import time
+import cyrtranslit
 import pandas as pd
+from functools import lru_cache
+from typing import Callable, List
+from gspread.utils import rowcol_to_a1
 
+from pages.helpers.banding import band_deviation, band_rpe_zones
+from pages.helpers.cache import read_cached_frame, write_cached_frame
+from pages.helpers.calendar_dimension import add_calendar_columns, build_calendar_for_dates
+from pages.helpers.constants import RPE_CACHE_NAME, RPE_CACHE_VERSION, RPE_TIMESTAMP_FORMAT, \
+    RPE_SESSION_DATE_FORMAT, RPE_SHEET_TIMEZONE, RPE_LOCAL_TIMEZONE
+from pages.helpers.google_api import execute_with_backoff
 
-def get_rpe_questioneer_df(worksheet) -> pd.DataFrame:
-    rows = worksheet.get_all_values()
-    df = pd.DataFrame(rows)
-    df.columns = df.iloc[0]
-    df = df.iloc[1:]
+
+@lru_cache(maxsize=None)
+def normalize_player_name(name: str) -> str:
+    name = name.replace('\t', '').upper()
+    return cyrtranslit.to_latin(name, "ru") if name else name
+
+
+def to_datetime_with_format(values: pd.Series, date_format: str) -> pd.Series:
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    # hand typed values that do not follow the format fall back to the slow parser
+    unparsed = parsed.isna() & (values != '')
+    if unparsed.any():
+        parsed[unparsed] = pd.to_datetime(values[unparsed], errors='coerce')
+    return parsed
+
+
+def parse_rpe_rows(header: List[str], rows: List[List[str]]) -> pd.DataFrame:
+    rows = [row + [''] * (len(header) - len(row)) for row in rows]
+    df = pd.DataFrame(rows, columns=header)
 
     df = df.rename(columns={
         'Timestamp': 'timestamp',
@@ -15,56 +39,101 @@ def get_rpe_questioneer_df(worksheet) -> pd.DataFrame:
         'Datum treninga / Session date': 'session_date',
         'RPE': 'rpe'
     })
-    df.name = df.name.str.replace('\t', '')
-    df.name = df.name.str.upper()
+    # every distinct name is normalized only once
+    unique_names = df.name.unique()
+    df.name = df.name.map(dict(zip(unique_names, map(normalize_player_name, unique_names))))
     # reverse player names
     # df.name = df.name.str.replace(r'(.+)\s(.+)', r'\2 \1')
-    df.timestamp = pd.to_datetime(df.loc[:, 'timestamp'])
+
+    # move to the correct timezone
+    timestamp = to_datetime_with_format(df.timestamp, RPE_TIMESTAMP_FORMAT)
+    df.timestamp = timestamp.dt.tz_localize(RPE_SHEET_TIMEZONE).dt.tz_convert(RPE_LOCAL_TIMEZONE).dt.tz_localize(None)
     df = df.dropna()
 
-    df.loc[:, 'session_date'] = df.apply(lambda r: f'{r.session_date}/{r.timestamp.year}', axis=1)
-    df.session_date = pd.to_datetime(df.session_date)
+    session_date = df.session_date + '/' + df.timestamp.dt.year.astype(str)
+    df.session_date = to_datetime_with_format(session_date, RPE_SESSION_DATE_FORMAT)
+    # hand typed session dates which could not be parsed at all are dropped like empty answers
+    return df.dropna(subset=['session_date'])
 
-    # move to the correct timezone
-    df.timestamp = df.loc[:, 'timestamp'].apply(lambda r: r + timedelta(hours=1))
+
+def prepare_rpe_df(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.drop(columns=[
+        'response_id', 'ip_addr', 'duration_sec',
+    ], errors='ignore')
+    df = df.sort_values('session_date', kind='stable').drop_duplicates(['session_date', 'name'], keep='last')
+
+    df = add_calendar_columns(df, 'session_date', build_calendar_for_dates(df.session_date))
+    df = df.assign(
+        session_date=df.session_date.dt.date,
+        rpe=df.rpe.astype(int),
+    )
     return df
 
 
-def extract_players_rpe_mean_and_std(session_df: pd.DataFrame, all_df: pd.DataFrame) -> tuple:
-    before_df = all_df[all_df.session_date < session_df.iloc[0].session_date]
-    players = session_df.name.unique()
-    mean_list = []
-    std_list = []
-    for player in players:
-        player_df = before_df[before_df.name == player]
-        mean_list.append(player_df.rpe.mean())
-        std_list.append(player_df.rpe.std())
-    return mean_list, std_list
+def get_rpe_questioneer_df(worksheet) -> pd.DataFrame:
+    rows = worksheet.get_all_values()
+    return parse_rpe_rows(rows[0], rows[1:])
 
 
-def define_colors_depending_on_std(session_df: pd.DataFrame, mean_list: list, std_list: list) -> list:
+def load_rpe_questioneer_df(open_worksheet: Callable, ttl_seconds: int, force_refresh=False) -> pd.DataFrame:
+    cached_df, meta = read_cached_frame(RPE_CACHE_NAME)
+    if meta.get('version') != RPE_CACHE_VERSION:
+        cached_df = None
+    if cached_df is not None and not force_refresh and time.time() - meta['synced_at'] < ttl_seconds:
+        return cached_df
+
+    worksheet = open_worksheet()
+    if cached_df is None or force_refresh:
+        # full sync, also picks up edited or deleted responses
+        rows = execute_with_backoff(worksheet.get_all_values)
+        header, new_rows, synced_rows = rows[0], rows[1:], 0
+        cached_df = None
+    else:
+        # form responses are only ever appended, so fetch the rows below the last synced one
+        header, synced_rows = meta['header'], meta['synced_rows']
+        last_column = re.sub(r'\d', '', rowcol_to_a1(1, len(header)))
+        new_rows = execute_with_backoff(lambda: worksheet.get_values(f'A{synced_rows + 2}:{last_column}'))
+
+    df = cached_df
+    if new_rows:
+        new_df = parse_rpe_rows(header, new_rows)
+        df = new_df if cached_df is None else pd.concat([cached_df, new_df], ignore_index=True)
+    elif df is None:
+        df = parse_rpe_rows(header, [])
+
+    write_cached_frame(RPE_CACHE_NAME, df, {
+        'synced_at': time.time(),
+        'synced_rows': synced_rows + len(new_rows),
+        'header': header,
+        'version': RPE_CACHE_VERSION,
+    })
+    return df
+
+
+def compute_rpe_baselines(rpe_df: pd.DataFrame) -> pd.DataFrame:
+    df = rpe_df[['name', 'session_date', 'rpe']].sort_values(['name', 'session_date'], kind='stable')
+    player_rpe = df.groupby('name').rpe.expanding()
+
+    # expanding stats include the current session, shift them so every row only sees earlier sessions
+    df['rpe_mean'] = player_rpe.mean().reset_index(level=0, drop=True)
+    df['rpe_std'] = player_rpe.std().reset_index(level=0, drop=True)
+    df[['rpe_mean', 'rpe_std']] = df.groupby('name')[['rpe_mean', 'rpe_std']].shift()
+    return df.set_index(['name', 'session_date'])[['rpe_mean', 'rpe_std']]
+
+
+def extract_players_rpe_mean_and_std(session_df: pd.DataFrame, baselines_df: pd.DataFrame) -> tuple:
     players = session_df.name.unique()
+    keys = pd.MultiIndex.from_arrays([players, [session_df.iloc[0].session_date] * len(players)])
+    player_baselines = baselines_df.reindex(keys)
+    return player_baselines.rpe_mean.tolist(), player_baselines.rpe_std.tolist()
 
-    DANGER = 'tomato'
-    WARNING = '#ffcc00'
-    NORMAL = 'skyblue'
-    colors = []
-    for player, p_mean, p_std in zip(players, mean_list, std_list):
-        value = session_df[session_df.name == player].rpe.iloc[0]
 
-        if ((p_mean - 2 * p_std) > value) or (value > (p_mean + 2 * p_std)):
-            colors.append(DANGER)
-        elif ((p_mean - p_std) > value) or (value > (p_mean + p_std)):
-            colors.append(WARNING)
-        else:
-            colors.append(NORMAL)
-    return colors
+def define_colors_depending_on_std(session_df: pd.DataFrame, mean_list: list, std_list: list) -> list:
+    values = session_df.drop_duplicates('name').rpe.values
+    colors, _ = band_deviation(values, mean_list, std_list)
+    return colors.tolist()
 
 
 def define_RPE_colors(values: list) -> list:
-    colors = []
-    for value in values:
-        for rpe_value, rpe_color in RPE_COLOR_DICT.items():
-            if int(round(value, 0)) == rpe_value:
-                colors.append(rpe_color)
-    return colors
+    colors, _ = band_rpe_zones(values)
+    return colors.tolist()
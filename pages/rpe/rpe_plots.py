@@ -1,10 +1,15 @@
-import matplotlib as mpl
-import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+import pandas as pd
 from typing import Tuple, List
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+from pages.helpers.banding import band_percentage_of_max
 from pages.helpers.constants import RPE_LEGEND_LIST
+from pages.helpers.figures import figure_style, new_figure
 from pages.rpe.rpe_helpers import define_RPE_colors
 
 
+@figure_style('classic')
 def create_rpe_bar_plot(
         figsize: Tuple,
         title: str,
@@ -13,9 +18,9 @@ def create_rpe_bar_plot(
         x_values: list,
         y_values: list,
         y_err=None
-) -> plt.Figure:
-    mpl.style.use('classic')
-    fig, ax = plt.subplots(figsize=figsize, nrows=1, ncols=1)
+) -> Figure:
+    fig = new_figure(figsize=figsize)
+    ax = fig.subplots(nrows=1, ncols=1)
     fig.suptitle(title, fontsize=20, weight='bold')
     facecolor = "white"
     fig.set_facecolor(facecolor)
@@ -45,7 +50,7 @@ def create_rpe_bar_plot(
     ax.set_xlabel(x_label, fontsize=18, weight='bold')
     ax.set_ylim(ymin=0, ymax=10)
     ax.set_facecolor(facecolor)
-    plt.xticks(rotation=90)
+    ax.tick_params(axis='x', labelrotation=90)
 
     ax.legend(
         handles=RPE_LEGEND_LIST, loc='upper center',
@@ -55,30 +60,46 @@ def create_rpe_bar_plot(
     return fig
 
 
-def get_colors_and_percentages(session_values: list, max_values: list, inverse_colors=False) -> Tuple[
-    List[str], List[int]]:
-    colors = []
-    percentages = []
+RPE_REPORT_FIGSIZE = (14, 8)
+# the signature is drawn below the axes, the download has to include it
+RPE_SESSION_REPORT_BBOX = Bbox([[0, -2.5], RPE_REPORT_FIGSIZE])
 
-    COLOR_DICT = {
-        'low': 'tomato',
-        'neutral': 'steelblue',
-        'high': 'forestgreen'
-    }
-    if inverse_colors:
-        COLOR_DICT['low'] = 'forestgreen'
-        COLOR_DICT['high'] = 'tomato'
 
-    for val, max_v in zip(session_values, max_values):
-        percentage = int(val / max_v * 100)
-        LOW = 40
-        HIGH = 80
-        if percentage < LOW:
-            color = COLOR_DICT['low']
-        elif LOW < percentage < HIGH:
-            color = 'steelblue'
-        else:
-            color = COLOR_DICT['high']
-        colors.append(color)
-        percentages.append(percentage)
-    return colors, percentages
+@figure_style('classic')
+def create_rpe_session_report_plot(players: list, session_values: list, session_date) -> Figure:
+    fig = create_rpe_bar_plot(
+        figsize=RPE_REPORT_FIGSIZE,
+        title=f'RPE session report {session_date}',
+        x_label='Players',
+        y_label='RPE',
+        x_values=players,
+        y_values=session_values
+    )
+    fig.text(0.82, -0.2, "Created by Arian Skoki", ha="center", va="bottom", fontsize=14, weight='bold')
+    return fig
+
+
+@figure_style('classic')
+def create_rpe_team_report_plot(week_df: pd.DataFrame, title: str) -> Figure:
+    fig = create_rpe_bar_plot(
+        figsize=RPE_REPORT_FIGSIZE,
+        title=title,
+        x_label='Dates',
+        y_label='RPE',
+        x_values=week_df.session_date,
+        y_values=week_df.rpe_mean.values,
+        y_err=week_df.rpe_std.values
+    )
+    fig.text(0.82, 0.01, "Created by Arian Skoki", ha="center", va="bottom", fontsize=14, weight='bold')
+    ax = fig.axes[0]
+    ax.tick_params(axis='x', labelrotation=15)
+
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%Y'))
+    ax.xaxis.set_major_locator(mdates.DayLocator())
+    return fig
+
+
+def get_colors_and_percentages(session_values: list, max_values: list, inverse_colors=False) -> Tuple[
+    List[str], List[int]]:
+    colors, _, percentages = band_percentage_of_max(session_values, max_values, inverse_colors=inverse_colors)
+    return colors.tolist(), percentages.tolist()
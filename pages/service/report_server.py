@@ -0,0 +1,286 @@
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import argparse
+import threading
+import traceback
+import matplotlib
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Tuple
+
+from pages.gps_relative.gps_relative_helpers import build_max_features_index, update_max_features_index
+from pages.helpers.cache import refresh_derived_store
+from pages.helpers.constants import SECRETS_PATH, RPE_CACHE_TTL_SECONDS, GPS_DATA_TTL_SECONDS, \
+    REPORT_SERVICE_QUEUE_SIZE, REPORT_SERVICE_TIMEOUT_SECONDS
+from pages.helpers.data_sources import load_secrets, load_gps_data, load_rpe_frames
+from pages.helpers.google_api import GoogleClientProvider
+from pages.helpers.gps_data import read_gps_file
+from pages.helpers.gps_dataset import GpsDataset
+from pages.helpers.render_cache import DISPLAY_PNG_KWARGS, render_plot, render_pdf_report
+from pages.helpers.reports import ReportSpec, ReportNotFound, BadRequest, iter_plot_figures, \
+    build_rpe_session_report, build_rpe_team_report, build_gps_session_report, build_gps_team_report, \
+    build_gps_player_report
+from pages.helpers.team_aggregates import build_daily_team_aggregates, update_daily_team_aggregates
+
+REPORT_PATH_PATTERN = re.compile(r'^/reports/(?P<report>[\w-]+)\.(?P<format>png|pdf|json)$')
+REPORT_CONTENT_TYPES = {'png': 'image/png', 'pdf': 'application/pdf', 'json': 'application/json'}
+
+_worker_config = {}
+_worker_data = {}
+
+
+def init_worker(config: dict):
+    matplotlib.use('Agg')
+    _worker_config.update(config)
+
+
+def get_worker_provider() -> GoogleClientProvider:
+    if 'provider' not in _worker_data:
+        _worker_data['provider'] = GoogleClientProvider(dict(_worker_config['secrets']['google_api']))
+    return _worker_data['provider']
+
+
+def get_fresh_worker_data(name: str, ttl_seconds: int, load_fn):
+    # every worker keeps its own copy, reloaded after the same time the dashboard keeps its data
+    loaded_at, data = _worker_data.get(name, (None, None))
+    if loaded_at is None or time.time() - loaded_at > ttl_seconds:
+        data = load_fn()
+        _worker_data[name] = (time.time(), data)
+    return data
+
+
+def get_gps_df():
+    gps_file = _worker_config.get('gps_file')
+    if gps_file:
+        dataset = get_fresh_worker_data('gps', float('inf'), lambda: GpsDataset(read_gps_file(gps_file)))
+    else:
+        google_drive_config = _worker_config['secrets']['google_drive']
+        dataset = get_fresh_worker_data(
+            'gps', GPS_DATA_TTL_SECONDS, lambda: load_gps_data(get_worker_provider(), google_drive_config)
+        )
+    return dataset.view()
+
+
+def get_rpe_frames():
+    sheet_name = _worker_config['secrets']['google_sheets']['rpe_sheet_name']
+    return get_fresh_worker_data(
+        'rpe', RPE_CACHE_TTL_SECONDS, lambda: load_rpe_frames(get_worker_provider(), sheet_name, RPE_CACHE_TTL_SECONDS)
+    )
+
+
+def get_param(params: dict, name: str) -> str:
+    if name not in params:
+        raise BadRequest(f'Missing query parameter {name}')
+    return params[name]
+
+
+def get_date_param(params: dict, name: str) -> date:
+    try:
+        return date.fromisoformat(get_param(params, name))
+    except ValueError:
+        raise BadRequest(f'Query parameter {name} is not an iso date') from None
+
+
+def get_int_param(params: dict, name: str, default: int) -> int:
+    try:
+        return int(params.get(name, default))
+    except ValueError:
+        raise BadRequest(f'Query parameter {name} is not an integer') from None
+
+
+def build_rpe_session(params: dict) -> ReportSpec:
+    rpe_df, baselines_df = get_rpe_frames()
+    return build_rpe_session_report(rpe_df, baselines_df, get_date_param(params, 'date'))
+
+
+def build_rpe_team(params: dict) -> ReportSpec:
+    rpe_df, _ = get_rpe_frames()
+    return build_rpe_team_report(rpe_df, get_date_param(params, 'start'), get_date_param(params, 'end'))
+
+
+def build_gps_session(params: dict) -> ReportSpec:
+    gps_df = get_gps_df()
+    max_index = refresh_derived_store(
+        'gps_max_features', gps_df, 'date_time', build_max_features_index, update_max_features_index
+    )
+    return build_gps_session_report(gps_df, max_index, get_param(params, 'date_time'))
+
+
+def build_gps_team(params: dict) -> ReportSpec:
+    team_aggregates_df = refresh_derived_store(
+        'gps_team_aggregates', get_gps_df(), 'date_time', build_daily_team_aggregates, update_daily_team_aggregates
+    )
+    return build_gps_team_report(team_aggregates_df, get_date_param(params, 'start'), get_date_param(params, 'end'))
+
+
+def build_gps_player(params: dict) -> ReportSpec:
+    return build_gps_player_report(
+        get_gps_df(), get_param(params, 'player'), get_date_param(params, 'start'), get_date_param(params, 'end')
+    )
+
+
+REPORT_BUILDERS = {
+    'rpe-session': build_rpe_session,
+    'rpe-team': build_rpe_team,
+    'gps-session': build_gps_session,
+    'gps-team': build_gps_team,
+    'gps-player': build_gps_player,
+}
+
+
+def render_report(report: str, report_format: str, params: dict) -> Tuple[bytes, str]:
+    spec = REPORT_BUILDERS[report](params)
+    if report_format == 'json':
+        return spec.data.to_json(orient='records', date_format='iso').encode(), spec.title
+    if report_format == 'pdf':
+        return render_pdf_report(iter_plot_figures, spec.plots), spec.title
+
+    # multi page reports are fetched one figure at a time as png
+    plot_index = get_int_param(params, 'plot', 0)
+    if not 0 <= plot_index < len(spec.plots):
+        raise ReportNotFound(f'{report} has {len(spec.plots)} plots')
+    plot_fn, args = spec.plots[plot_index]
+    return render_plot(plot_fn, *args, variants={'png': DISPLAY_PNG_KWARGS})['png'], f'{spec.title}_{plot_index}'
+
+
+class ReportServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple, executor: ProcessPoolExecutor, workers: int, queue_size: int,
+                 timeout_seconds: float, token: str = None):
+        super().__init__(address, ReportRequestHandler)
+        self.executor = executor
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_seconds = timeout_seconds
+        self.token = token
+        # a slot is held from submission until the worker is done, also when the client gave up waiting
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.in_flight = 0
+        self.in_flight_lock = threading.Lock()
+
+    def submit(self, *args):
+        if not self.slots.acquire(blocking=False):
+            return None
+        with self.in_flight_lock:
+            self.in_flight += 1
+        future = self.executor.submit(render_report, *args)
+        future.add_done_callback(self.release_slot)
+        return future
+
+    def release_slot(self, _):
+        with self.in_flight_lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    server: ReportServer
+
+    def send_body(self, status: HTTPStatus, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: HTTPStatus, payload: dict, headers: dict = None):
+        self.send_body(status, json.dumps(payload).encode(), REPORT_CONTENT_TYPES['json'], headers)
+
+    def is_authorized(self, params: dict) -> bool:
+        if not self.server.token:
+            return True
+        header = self.headers.get('Authorization', '')
+        token = header[len('Bearer '):] if header.startswith('Bearer ') else params.get('token', '')
+        return hmac.compare_digest(token.encode(), self.server.token.encode())
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if not self.is_authorized(params):
+            return self.send_json(HTTPStatus.UNAUTHORIZED, {'error': 'Missing or wrong token'})
+
+        if url.path == '/health':
+            return self.send_json(HTTPStatus.OK, {
+                'workers': self.server.workers,
+                'queue_size': self.server.queue_size,
+                'in_flight': self.server.in_flight,
+                'reports': sorted(REPORT_BUILDERS),
+            })
+
+        match = REPORT_PATH_PATTERN.match(url.path)
+        if match is None or match['report'] not in REPORT_BUILDERS:
+            return self.send_json(HTTPStatus.NOT_FOUND, {'error': f'Unknown report {url.path}'})
+
+        params.pop('token', None)
+        future = self.server.submit(match['report'], match['format'], params)
+        if future is None:
+            return self.send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Report queue is full'}, {'Retry-After': '5'}
+            )
+
+        try:
+            body, title = future.result(timeout=self.server.timeout_seconds)
+        except FutureTimeoutError:
+            return self.send_json(HTTPStatus.GATEWAY_TIMEOUT, {'error': 'Report took too long'})
+        except BadRequest as error:
+            return self.send_json(HTTPStatus.BAD_REQUEST, {'error': str(error)})
+        except ReportNotFound as error:
+            return self.send_json(HTTPStatus.NOT_FOUND, {'error': str(error)})
+        except Exception:
+            # the traceback of the worker is chained to the error, the client only learns that the report failed
+            self.log_error('Report %s failed', url.path)
+            traceback.print_exc()
+            return self.send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'Report failed'})
+
+        filename = re.sub(r'[^\w\-. ]', '_', f'{title}.{match["format"]}', flags=re.ASCII)
+        self.send_body(HTTPStatus.OK, body, REPORT_CONTENT_TYPES[match['format']], {
+            'Content-Disposition': f'inline; filename="{filename}"',
+        })
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serve the session, team and player reports over http.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on, 0.0.0.0 for the local network')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of render processes')
+    parser.add_argument('--queue-size', type=int, default=REPORT_SERVICE_QUEUE_SIZE,
+                        help='requests waiting for a worker before new ones are rejected with 503')
+    parser.add_argument('--timeout', type=float, default=REPORT_SERVICE_TIMEOUT_SECONDS,
+                        help='seconds a request waits for its report')
+    parser.add_argument('--secrets', default=SECRETS_PATH, help='streamlit secrets.toml with the google settings')
+    parser.add_argument('--gps-file', help='serve GPS reports from this csv or parquet instead of google drive')
+    parser.add_argument('--token', default=os.environ.get('REPORT_SERVICE_TOKEN'),
+                        help='shared token clients send as a bearer token, defaults to $REPORT_SERVICE_TOKEN')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    secrets = load_secrets(args.secrets) if os.path.exists(args.secrets) else {}
+    worker_config = {'secrets': secrets, 'gps_file': args.gps_file}
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(worker_config,)) as executor:
+        server = ReportServer(
+            (args.host, args.port), executor, args.workers, args.queue_size, args.timeout, token=args.token
+        )
+        print(f'Serving reports on http://{args.host}:{args.port} with {args.workers} workers')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
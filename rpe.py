@@ -1,17 +1,14 @@
-import gspread
-import cyrtranslit
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
 import streamlit as st
-from datetime import datetime
 
-from matplotlib.transforms import Bbox
-from oauth2client.service_account import ServiceAccountCredentials
-
-from pages.helpers.utils import authenticate, add_download_image_button, add_page_logo
-from pages.rpe.rpe_plots import create_rpe_bar_plot
-from pages.rpe.rpe_helpers import get_rpe_questioneer_df, extract_players_rpe_mean_and_std
+from pages.gps_absolute.gps_absolute_plots import draw_report_plot, draw_rpe_srpe
+from pages.helpers.render_cache import render_plot, DOWNLOAD_PNG_KWARGS
+from pages.helpers.reports import build_rpe_session_df, build_rpe_team_df
+from pages.helpers.timing import timed_stage
+from pages.helpers.training_load import read_squad_load, read_player_sessions
+from pages.helpers.utils import authenticate, add_download_image_button, add_page_logo, load_page_data, \
+    start_page_timing, show_page_timings, load_rpe_training_load, load_player_identity_index
+from pages.rpe.rpe_plots import create_rpe_session_report_plot, create_rpe_team_report_plot, RPE_SESSION_REPORT_BBOX
+from pages.rpe.rpe_helpers import extract_players_rpe_mean_and_std
 
 add_page_logo()
 st.title("RPE")
@@ -19,118 +16,86 @@ st.title("RPE")
 status = authenticate()
 
 if status:
-    # Use creds to create a client to interact with the Google Drive API
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    creds = ServiceAccountCredentials.from_json_keyfile_dict({
-        "type": st.secrets.google_api.type,
-        "project_id": st.secrets.google_api.project_id,
-        "private_key_id": st.secrets.google_api.private_key_id,
-        "private_key": st.secrets.google_api.private_key,
-        "client_email": st.secrets.google_api.client_email,
-        "client_id": st.secrets.google_api.client_id,
-        "auth_uri": st.secrets.google_api.auth_uri,
-        "token_uri": st.secrets.google_api.token_uri,
-        "auth_provider_x509_cert_url": st.secrets.google_api.auth_provider_x509_cert_url,
-        "client_x509_cert_url": st.secrets.google_api.client_x509_cert_url,
-    }, scope)
-    client = gspread.authorize(creds)
-
-    # Open the Google Sheets document
-    sheet = client.open(st.secrets.google_sheets.rpe_sheet_name).sheet1
-
-    rpe_df = get_rpe_questioneer_df(worksheet=sheet)
-    rpe_df = rpe_df.drop(columns=[
-        'response_id', 'ip_addr', 'duration_sec',
-    ], errors='ignore')
-    rpe_df = rpe_df.sort_values('session_date').drop_duplicates(['session_date', 'name'], keep='last')
-    rpe_df.timestamp = pd.to_datetime(rpe_df.timestamp, unit='ns', utc=False).dt.tz_localize(None)
-
-    rpe_df.loc[:, 'name'] = rpe_df.name.apply(lambda r: cyrtranslit.to_latin(r, "ru") if r else r)
-    rpe_df.session_date = pd.to_datetime(rpe_df.session_date).dt.date
-    rpe_df.rpe = rpe_df.loc[:, 'rpe'].astype(int)
+    start_page_timing('rpe')
+    refresh_data = st.sidebar.button('Refresh RPE data')
+    with timed_stage('load data'):
+        # the GPS export is only needed for the training load, it is fetched together with the sheet
+        gps_dataset, (rpe_df, baselines_df) = load_page_data('gps', 'rpe', refresh=('rpe',) if refresh_data else ())
 
     session_dates = rpe_df.sort_values('session_date').session_date.unique()
     session_date = st.selectbox('Select training date', session_dates, index=len(session_dates) - 1)
 
-    session_df = rpe_df[rpe_df.session_date == session_date]
-    session_df = session_df.drop_duplicates(subset=['name', 'session_date'], keep='last')
-    session_df.reset_index(inplace=True, drop=True)
+    with timed_stage('session transforms'):
+        session_df = build_rpe_session_df(rpe_df, session_date)
 
     # ---------------------------------------------
     st.header("Session report")
 
-    players = session_df.name.unique()
-    session_param_values = session_df.rpe.values
-    mean_l, std_l = extract_players_rpe_mean_and_std(session_df, rpe_df)
-
-    fig = create_rpe_bar_plot(
-        figsize=(14, 8),
-        title=f'RPE session report {session_date}',
-        x_label='Players',
-        y_label='RPE',
-        x_values=players,
-        y_values=session_param_values
-    )
-    fig.text(0.82, -0.2, "Created by Arian Skoki", ha="center", va="bottom", fontsize=14, weight='bold')
-    st.pyplot(fig)
+    with timed_stage('session baselines'):
+        players = session_df.name.unique()
+        session_param_values = session_df.rpe.values
+        mean_l, std_l = extract_players_rpe_mean_and_std(session_df, baselines_df)
+
+    with timed_stage('session report'):
+        session_report = render_plot(create_rpe_session_report_plot, players, session_param_values, session_date)
+    with timed_stage('session report transfer'):
+        st.image(session_report['display'], use_column_width=True)
     add_download_image_button(
-        fig, "Download session report", f'RPE_session_report_{session_date}.png',
-        bbox_inches=Bbox([[0, -2.5], fig.get_size_inches()])
+        "Download session report", f'RPE_session_report_{session_date}.png',
+        create_rpe_session_report_plot, players, session_param_values, session_date,
+        savefig_kwargs={**DOWNLOAD_PNG_KWARGS, 'bbox_inches': RPE_SESSION_REPORT_BBOX}
     )
 
     # ---------------------------------------------
     st.markdown("""---""")
     st.header("Team report")
 
-    rpe_df.loc[:, 'week'] = rpe_df.session_date.apply(lambda r: r.isocalendar()[1])
-    rpe_df.loc[:, 'year'] = rpe_df.session_date.apply(lambda r: r.isocalendar()[0])
-
     start_offset_days = 7
     start_index = len(session_dates) - 1 - start_offset_days
     start_index = 0 if start_index < 0 else start_index
     session_start_date = st.selectbox('Select start date', session_dates, index=start_index)
     session_end_date = st.selectbox('Select end date', session_dates, index=len(session_dates) - 1)
 
-    week_df = rpe_df[
-        (rpe_df.session_date >= session_start_date) &
-        (rpe_df.session_date <= session_end_date)
-        ]
-    week_df = week_df.groupby('session_date', as_index=False).agg({'rpe': ['mean', 'std']})
-    week_df.columns = week_df.columns.droplevel()
-    week_df = week_df.rename(columns={'': 'session_date', 'mean': 'rpe_mean', 'std': 'rpe_std'})
-    week_df.rpe_mean = week_df.rpe_mean.round(2)
-    week_df.rpe_std = week_df.rpe_std.round(2)
-
-    date_obj = datetime.strptime(str(week_df.session_date.iloc[0]), '%Y-%m-%d')
-    start_of_week = date_obj
-    end_date_obj = datetime.strptime(str(week_df.session_date.iloc[-1]), '%Y-%m-%d')
-    end_of_week = end_date_obj
-
-    idx = pd.date_range(start_of_week, end_of_week)
-    week_df.index = pd.DatetimeIndex(week_df.session_date)
-    week_df = week_df.drop(columns=['session_date'])
-    week_df = week_df.reindex(idx, fill_value=0)
-    week_df = week_df.reset_index().rename(columns={'index': 'session_date'})
-    week_df.loc[:, 'session_date'] = pd.to_datetime(week_df.session_date).dt.date
-
-    week_values = week_df.rpe_mean.values
+    with timed_stage('team transforms'):
+        week_df = build_rpe_team_df(rpe_df, session_start_date, session_end_date)
 
     team_report_title = f'RPE team report {session_start_date.strftime("%d.%m.%y")}-{session_end_date.strftime("%d.%m.%y")}'
-    fig = create_rpe_bar_plot(
-        figsize=(14, 8),
-        title=team_report_title,
-        x_label='Dates',
-        y_label='RPE',
-        x_values=week_df.session_date,
-        y_values=week_values,
-        y_err=week_df.rpe_std.values
+    with timed_stage('team report'):
+        team_report = render_plot(create_rpe_team_report_plot, week_df, team_report_title)
+    with timed_stage('team report transfer'):
+        st.image(team_report['display'], use_column_width=True)
+    add_download_image_button(
+        "Download team report", f'{team_report_title}.png',
+        create_rpe_team_report_plot, week_df, team_report_title
     )
-    fig.text(0.82, 0.01, "Created by Arian Skoki", ha="center", va="bottom", fontsize=14, weight='bold')
-    plt.xticks(rotation=15)
-
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%Y'))
-    plt.gca().xaxis.set_major_locator(mdates.DayLocator())
-
-    st.pyplot(fig=fig)
-    add_download_image_button(fig, "Download team report", f'{team_report_title}.png')
     # ---------------------------------------------
+    st.markdown("""---""")
+    st.header("Training load")
+    st.text('sRPE is RPE times the GPS session duration, ratios compare the last 7 days to the last 28.')
+
+    with timed_stage('training load'):
+        training_load = load_rpe_training_load(rpe_df, gps_dataset)
+        squad_load_df = read_squad_load(training_load, session_end_date)
+    st.subheader(f'Squad load on {session_end_date}')
+    st.dataframe(squad_load_df, use_container_width=True)
+    identity_names_df = load_player_identity_index(rpe_df, gps_dataset).names
+    unmatched_names = identity_names_df.index[identity_names_df.method == 'unmatched']
+    if len(unmatched_names):
+        st.caption(f'No GPS athlete found for {", ".join(unmatched_names)}, their load uses the squad session duration.')
+
+    load_players = training_load.daily.columns
+    load_player = st.selectbox('Select player', load_players)
+    with timed_stage('player load transforms'):
+        player_load_df = read_player_sessions(training_load, load_player, session_start_date, session_end_date)
+
+    if not player_load_df.empty:
+        with timed_stage('player load report'):
+            player_load_report = render_plot(draw_report_plot, draw_rpe_srpe, player_load_df, load_player)
+        with timed_stage('player load report transfer'):
+            st.image(player_load_report['display'], use_column_width=True)
+        add_download_image_button(
+            "Download player load report", f'{load_player}_load_{session_start_date}_{session_end_date}.png',
+            draw_report_plot, draw_rpe_srpe, player_load_df, load_player
+        )
+    # ---------------------------------------------
+    show_page_timings()
@@ -1,42 +1,24 @@
-import pandas as pd
 import streamlit as st
-import matplotlib as mpl
-from pages.gps_absolute.gps_absolute_plots import draw_hsr_sprint_plot, draw_mpe_max_sprint, draw_mpe_p_avg_rec_t, \
-    draw_distance_duration
-from pages.helpers.utils import authenticate, load_google_drive_data, add_download_image_button, add_page_logo, \
-    add_download_pdf_from_plots_button
+from pages.gps_absolute.gps_absolute_charts import REPORT_CHARTS, draw_report_chart
+from pages.gps_absolute.gps_absolute_plots import REPORT_PLOTS, draw_report_plot, iter_report_figures
+from pages.helpers.constants import TEAM_ANALYSIS_METRICS
+from pages.helpers.render_cache import render_plot
+from pages.helpers.team_aggregates import slice_daily_team_aggregates
+from pages.helpers.timing import timed_stage
+from pages.helpers.utils import authenticate, load_page_data, add_page_logo, add_download_pdf_from_plots_button, \
+    load_gps_team_aggregates, start_page_timing, show_page_timings, use_interactive_charts
 
 add_page_logo()
 status = authenticate()
 if status:
-    mpl.style.use('ggplot')
-    df = load_google_drive_data()
+    start_page_timing('gps_absolute')
+    with timed_stage('load GPS data'):
+        dataset = load_page_data('gps')[0]
     st.title("GPS single session")
     st.header("Individual Analysis")
 
-    cols_2_keep = [
-        'date_time', 'athlete', 'duration_min', 'total_distance',
-        'mpe_count', 'acc_events', 'dec_events', 'hsr_dist', 'sprint_dist',
-        'avg_speed_(kmh)', 'avg_hr_(bmin)', 'avg_hrr%_(%)',
-        'max_speed_km_h', 'max_acc_(ms²)',
-        'max_dec_(ms²)', 'max_hr_(bmin)', 'max_hrr%_(%)',
-        'avg_met_power_(wkg)', 'energy', 'an_energy',
-        'mpe_avg_time_(s)', 'mpe_avg_power',
-        'mpe_avg_rec_time', 'mpe_rec_avg_power_(wkg)',
-        'speed_events', 'impacts', 'jumps', 'is_match',
-    ]
-    # This is different order than relative analysis
-    f_df = df[cols_2_keep]
-    f_df = f_df.rename(columns={
-        'total_distance': 'tot_dist',
-        'mpe_count': 'mpe',
-        'acc_events': 'acc_num',
-        'dec_events': 'dec_num',
-    })
-
-    f_df.loc[:, 'date'] = pd.to_datetime(f_df.date_time).dt.date
-    f_df.loc[:, 'week'] = f_df.date.apply(lambda r: r.isocalendar()[1])
-    f_df.loc[:, 'year'] = f_df.date.apply(lambda r: r.isocalendar()[0])
+    with timed_stage('calendar columns'):
+        f_df = dataset.view(['athlete', 'is_match', 'date', 'week', 'year', 'match_week', *TEAM_ANALYSIS_METRICS])
 
     st.header('Player session analysis')
     start_offset_days = 7
@@ -48,30 +30,27 @@ if status:
     select_players = f_df.athlete.unique()
     selected_player = st.selectbox('Select athlete to watch', select_players, index=len(select_players) - 1)
 
-    player_df = f_df[
-        (f_df.date >= session_start_date) &
-        (f_df.date <= session_end_date) &
-        (f_df.athlete == selected_player)
-        ]
-    fig_run, ax_run = draw_hsr_sprint_plot(player_df)
-    fig_run.suptitle(selected_player)
-    st.pyplot(fig_run)
-
-    fig_mpe_s, ax1_mpe_s, ax2_mpe_s = draw_mpe_max_sprint(player_df)
-    fig_mpe_s.suptitle(selected_player)
-    st.pyplot(fig_mpe_s)
-
-    fig_mpe_p, ax1_mpe_p, ax2_mpe_p = draw_mpe_p_avg_rec_t(player_df)
-    fig_mpe_p.suptitle(selected_player)
-    st.pyplot(fig_mpe_p)
-
-    fig_dist_dur, ax1_dist_dur, ax2_dist_dur = draw_distance_duration(player_df)
-    fig_dist_dur.suptitle(selected_player)
-    st.pyplot(fig_dist_dur)
+    with timed_stage('player transforms'):
+        player_df = f_df[
+            (f_df.date >= session_start_date) &
+            (f_df.date <= session_end_date) &
+            (f_df.athlete == selected_player)
+            ]
+    if use_interactive_charts(session_start_date, session_end_date, 'player'):
+        for chart_fn in REPORT_CHARTS:
+            with timed_stage(f'player {chart_fn.func.__name__} chart'):
+                st.altair_chart(draw_report_chart(chart_fn, player_df, selected_player), use_container_width=True)
+    else:
+        for plot_fn in REPORT_PLOTS:
+            with timed_stage(f'player {plot_fn.__name__}'):
+                player_plot = render_plot(draw_report_plot, plot_fn, player_df, selected_player)
+            with timed_stage(f'player {plot_fn.__name__} transfer'):
+                st.image(player_plot['display'], use_column_width=True)
 
     add_download_pdf_from_plots_button(
         'Download player pdf report',
-        f'{selected_player}_performance.pdf'
+        f'{selected_player}_performance.pdf',
+        iter_report_figures, player_df, selected_player
     )
     # -----------------------------------
     # st.header('Player week analysis')
@@ -117,47 +96,27 @@ if status:
     team_start_date = st.selectbox('Select start date', session_dates, index=start_offset_days, key='team_key_start')
     team_end_date = st.selectbox('Select end date', session_dates, index=0, key='team_key_end')
 
-    session_df = f_df[
-        (f_df.date >= team_start_date) &
-        (f_df.date <= team_end_date)
-        ]
-    team_df = session_df.groupby('date').agg({
-        'duration_min': 'mean',
-        'athlete': 'count',
-        'tot_dist': 'mean',
-        'max_speed_km_h': 'mean',
-        'mpe': 'mean',
-        'acc_num': 'mean',
-        'dec_num': 'mean',
-        'energy': 'mean',
-        'an_energy': 'mean',
-        'mpe_avg_power': 'mean',
-        'mpe_avg_rec_time': 'mean',
-        'hsr_dist': 'mean',
-        'sprint_dist': 'mean',
-        'is_match': 'first'
-    })
-    team_df = team_df.reset_index()
-    team_df = team_df.fillna(0)
+    with timed_stage('team aggregates'):
+        team_df = slice_daily_team_aggregates(
+            load_gps_team_aggregates(dataset), team_start_date, team_end_date, TEAM_ANALYSIS_METRICS
+        )
+        team_df = team_df.fillna(0)
 
     team_title = f'Team {team_start_date}_{team_end_date}'
-    fig_run, ax_run = draw_hsr_sprint_plot(team_df)
-    fig_run.suptitle(team_title)
-    st.pyplot(fig_run)
-
-    fig_mpe_s, ax1_mpe_s, ax2_mpe_s = draw_mpe_max_sprint(team_df)
-    fig_mpe_s.suptitle(team_title)
-    st.pyplot(fig_mpe_s)
-
-    fig_mpe_p, ax1_mpe_p, ax2_mpe_p = draw_mpe_p_avg_rec_t(team_df)
-    fig_mpe_p.suptitle(team_title)
-    st.pyplot(fig_mpe_p)
-
-    fig_dist_dur, ax1_dist_dur, ax2_dist_dur = draw_distance_duration(team_df)
-    fig_dist_dur.suptitle(team_title)
-    st.pyplot(fig_dist_dur)
+    if use_interactive_charts(team_start_date, team_end_date, 'team'):
+        for chart_fn in REPORT_CHARTS:
+            with timed_stage(f'team {chart_fn.func.__name__} chart'):
+                st.altair_chart(draw_report_chart(chart_fn, team_df, team_title), use_container_width=True)
+    else:
+        for plot_fn in REPORT_PLOTS:
+            with timed_stage(f'team {plot_fn.__name__}'):
+                team_plot = render_plot(draw_report_plot, plot_fn, team_df, team_title)
+            with timed_stage(f'team {plot_fn.__name__} transfer'):
+                st.image(team_plot['display'], use_column_width=True)
 
     add_download_pdf_from_plots_button(
         'Download team pdf report',
-        f'Team_performance_{team_start_date}_{team_end_date}.pdf'
+        f'Team_performance_{team_start_date}_{team_end_date}.pdf',
+        iter_report_figures, team_df, team_title
     )
+    show_page_timings()